@@ -0,0 +1,3 @@
+'''Headless, seeded benchmarks of epg and the game's hot paths
+
+Run ``python -m benchmarks --help`` from the repository root.'''
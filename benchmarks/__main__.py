@@ -0,0 +1,59 @@
+import argparse
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from . import memory, replay, runner, scenarios
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+        description="Run the headless epg/game benchmarks and print the results as JSON.")
+    parser.add_argument("scenarios", nargs="*", help="scenarios to run (default: all)")
+    parser.add_argument("--frames", type=int, default=300, help="measured frames per scenario")
+    parser.add_argument("--warmup", type=int, default=30, help="unmeasured frames per scenario")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the global RNG")
+    parser.add_argument("--out", help="write the JSON result to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare with a saved result")
+    parser.add_argument("--threshold", type=float, default=0.1,
+        help="relative slowdown reported as a regression (default: 0.1)")
+    parser.add_argument("--list", action="store_true", help="list the scenarios and exit")
+    parser.add_argument("--memory", action="store_true",
+        help="print the bytes per entity of Sprite based and slotted objects and exit")
+    parser.add_argument("--replay", action="store_true",
+        help="check that recorded input replays with the same key states and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(scenarios.SCENARIOS))
+        return 0
+
+    unknown = set(args.scenarios) - set(scenarios.SCENARIOS)
+    if unknown:
+        parser.error("unknown scenario(s): " + ", ".join(sorted(unknown)))
+
+    runner.setup(ROOT)
+    if args.memory:
+        print(json.dumps(memory.run(), indent=2))
+        return 0
+    if args.replay:
+        result = replay.run()
+        print(json.dumps(result, indent=2))
+        return 1 if result["mismatches"] else 0
+    result = runner.run(args.scenarios, args.frames, args.warmup, args.seed)
+
+    if args.out:
+        runner.dump(result, args.out)
+    else:
+        print(json.dumps(result, indent=2))
+
+    if args.compare:
+        lines, regressed = runner.compare(result, runner.load(args.compare), args.threshold)
+        print("\n".join(lines), file=sys.stderr)
+        return 1 if regressed else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
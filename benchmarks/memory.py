@@ -0,0 +1,57 @@
+'''Bytes per entity of the high-count game objects, as Sprite based objects and as slotted Entities'''
+import gc
+import tracemalloc
+import epg
+from . import scenarios
+
+game = scenarios.game
+
+class SpriteBullet(epg.sprite.Sprite):
+    '''Bullet as it was laid out before Entity: a Sprite with an instance __dict__'''
+    id, speed, damage = game.Bullet.id, game.Bullet.speed, game.Bullet.damage
+    reset, init = game.Bullet.reset, game.Bullet.init
+
+    def __init__(self, *args, **kw):
+        super().__init__()
+        self.reset(*args, **kw)
+
+def star_action():
+    return (game.FadeIn(1000) >> game.Delay(1000) >> game.FadeOut(1000)) * float("inf")
+
+def tip_surface():
+    return epg.text_render("10")
+
+def get_pairs(g):
+    '''Return {name: (before, after)} factories building equivalent objects'''
+    star = epg.Surface((2, 2))
+    tip = tip_surface()
+    return {
+        "bullet":(lambda: SpriteBullet(g, (0, 0), (1, 0), is_player=True),
+                  lambda: game.Bullet(g, (0, 0), (1, 0), is_player=True)),
+        "star":(lambda: epg.AStatic(star, star_action(), center=(10, 10)),
+                lambda: epg.sprite.AEntity(star, star_action(), center=(10, 10))),
+        "tip":(lambda: epg.AStatic(tip, game.Game.TIP_ACTION, center=(10, 10)),
+               lambda: epg.sprite.AEntity(tip, game.Game.TIP_ACTION, center=(10, 10))),
+    }
+
+def measure(factory, n=2000):
+    '''Return the Python heap bytes held per object, with the objects kept in a group'''
+    group = epg.sprite.Group()
+    factory() # warm up caches shared by all instances
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(n):
+        group.add(factory())
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / n
+
+def run(n=2000):
+    g = scenarios.god_mode(game.Game(scenarios.main_menu(), 1, game.AbilityManager({})))
+    result = {}
+    for name, (before, after) in get_pairs(g).items():
+        sprite, entity = measure(before, n), measure(after, n)
+        result[name] = {"sprite":round(sprite, 1), "entity":round(entity, 1),
+                        "saved":round(1 - entity / sprite, 3)}
+    return result
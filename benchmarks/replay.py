@@ -0,0 +1,54 @@
+'''Record synthetic input frames and check that the replay returns the same key and mouse states'''
+import os
+import tempfile
+import pygame as pg
+import epg
+
+# keycode: scancode
+KEYS = {pg.K_a:pg.KSCAN_A, pg.K_w:pg.KSCAN_W, pg.K_SPACE:pg.KSCAN_SPACE, pg.K_LEFT:pg.KSCAN_LEFT}
+
+def get_frames():
+    '''Return [(pressed keycodes, mouse pos)], one per frame'''
+    keys = tuple(KEYS)
+    return [(keys[:i % (len(keys) + 1)], (i, 2 * i)) for i in range(10)]
+
+class FakeSource(epg.input.Source):
+    def __init__(self, frames):
+        self.inputs = iter(frames)
+
+    def begin_frame(self):
+        down, pos = next(self.inputs)
+        keys = [False] * 512
+        for key in down:
+            keys[KEYS[key]] = True
+        return pg.key.ScancodeWrapper(keys), pos
+
+class FakeRecorder(epg.input.Recorder, FakeSource):
+    def __init__(self, path, frames):
+        epg.input.Recorder.__init__(self, path, seed=0)
+        FakeSource.__init__(self, frames)
+
+def run():
+    '''Return {"frames", "mismatches"}, a mismatch being (frame, key or "mouse", recorded, replayed)'''
+    frames = get_frames()
+    fd, path = tempfile.mkstemp(suffix=".bin")
+    os.close(fd)
+    try:
+        recorder = FakeRecorder(path, frames)
+        recorded = [recorder.begin_frame() for i in frames]
+        recorder.close()
+
+        replayer = epg.input.Replayer(path, end_func=lambda: None)
+        replayed = [replayer.begin_frame() for i in frames]
+    finally:
+        os.remove(path)
+    epg.input.stop()
+
+    mismatches = []
+    for i, ((keys1, pos1), (keys2, pos2)) in enumerate(zip(recorded, replayed)):
+        for key in KEYS:
+            if keys1[key] != keys2[key]:
+                mismatches.append((i, pg.key.name(key), keys1[key], keys2[key]))
+        if tuple(pos1) != tuple(pos2):
+            mismatches.append((i, "mouse", pos1, pos2))
+    return {"frames":len(frames), "mismatches":mismatches}
@@ -0,0 +1,75 @@
+import os
+import json
+import random
+import time
+import epg
+from . import scenarios
+
+def setup(root):
+    epg.assets = os.path.join(root, "assets")
+    epg.font.set_default("font.ttf")
+    app = epg.init((scenarios.game.WIDTH, scenarios.game.HEIGHT), headless=True)
+    epg.data.set_default_path(os.path.join(root, ".bench_savefile.bin"))
+    epg.mixer.music.load(epg.get_asset("click.ogg"))
+    return app
+
+def distribution(times):
+    times = sorted(times)
+    n = len(times)
+    return {"min":times[0], "avg":sum(times) / n, "p50":times[n // 2],
+            "p95":times[int(0.95 * (n - 1))], "p99":times[int(0.99 * (n - 1))], "max":times[-1]}
+
+def run_scenario(name, frames=300, warmup=30, seed=0):
+    '''Build the scenario with a seeded RNG and return its frame timings (ms)'''
+    random.seed(seed)
+    epg.sim_time = 0
+    scene = scenarios.SCENARIOS[name]()
+    epg.app.switch(scene)
+    scene.start()
+
+    times = []
+    for i in range(warmup + frames):
+        if not scene.scene_running:
+            break
+        start = time.perf_counter()
+        scene.single_run()
+        if i >= warmup:
+            times.append((time.perf_counter() - start) * 1000)
+    scene.quit()
+
+    if not times:
+        epg.throw("scenario", name, "stopped during warmup")
+    total = sum(times)
+    return {"frames":len(times), "fps":len(times) / total * 1000, "frame_ms":distribution(times)}
+
+def run(names=None, frames=300, warmup=30, seed=0):
+    names = names or list(scenarios.SCENARIOS)
+    return {"seed":seed, "frames":frames, "pygame":epg.version.ver,
+            "scenarios":{name:run_scenario(name, frames, warmup, seed) for name in names}}
+
+def compare(result, baseline, threshold=0.1):
+    '''Return (report lines, regressed) comparing the average frame time with a baseline'''
+    lines, regressed = [], False
+    lines.append(f"{'scenario':<16}{'base ms':>10}{'now ms':>10}{'change':>9}")
+    for name, now in result["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if not base:
+            lines.append(f"{name:<16}{'-':>10}{now['frame_ms']['avg']:>10.3f}{'new':>9}")
+            continue
+        b, n = base["frame_ms"]["avg"], now["frame_ms"]["avg"]
+        change = (n - b) / b
+        flag = ""
+        if change > threshold:
+            flag, regressed = " REGRESSION", True
+        elif change < -threshold:
+            flag = " faster"
+        lines.append(f"{name:<16}{b:>10.3f}{n:>10.3f}{change:>+9.1%}{flag}")
+    return lines, regressed
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def dump(result, path):
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
@@ -0,0 +1,78 @@
+import epg
+import main as game
+
+SCENARIOS = {}
+
+def scenario(name):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+def god_mode(g):
+    g.player.take_damage = lambda damage: None
+    return g
+
+def main_menu():
+    return game.MainMenu()
+
+def make_level(level, enemies=8):
+    def build():
+        g = god_mode(game.Game(main_menu(), level, game.AbilityManager({})))
+        for i in range(enemies):
+            g.add_enemy(getattr(game, f"Enemy{level}"))
+        return g
+    return build
+
+for level in range(1, game.MAX_LEVEL + 1):
+    scenario(f"game_level{level}")(make_level(level))
+
+@scenario("boss5_rings")
+def boss5_rings():
+    g = god_mode(game.Game(main_menu(), 5, game.AbilityManager({})))
+    g.boss = game.Boss5(g)
+    g.bosses.add(g.boss)
+    return g
+
+@scenario("smoke_effect")
+def smoke_effect():
+    s = main_menu()
+    def replay():
+        if not s.effects:
+            s.play_smoke_effect()
+    s.add_func(replay, "replay_smoke")
+    return s
+
+@scenario("credits")
+def credits():
+    return game.CreditsPage()
+
+class UITree(epg.Scene):
+    depth = 5
+    breadth = 3
+
+    def init(self):
+        self.container = epg.ui.Container(self)
+        self.build(self.container, self.depth)
+
+    def build(self, parent, depth):
+        for i in range(self.breadth):
+            f = epg.ui.Frame(parent, width=4 + depth, height=4 + depth, inpad=1, outpad=1)
+            if depth % 2:
+                f.pack(side="left" if i % 2 else "top")
+            else:
+                f.grid(row=i // 2, column=i % 2)
+            if depth > 1:
+                self.build(f, depth - 1)
+
+    def update(self):
+        self.container.update_display()
+        self.container.update()
+
+    def draw(self):
+        self.screen.fill((0, 0, 0))
+        self.container.draw()
+
+@scenario("ui_tree")
+def ui_tree():
+    return UITree()
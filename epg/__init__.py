@@ -1,9 +1,16 @@
+from time import perf_counter as _perf_counter
+_import_start = _perf_counter()
+
 import pygame as pg
 from pygame import *
 import os
 import sys
 import asyncio
 import warnings
+import importlib
+
+_import_times = {"pygame":(_perf_counter() - _import_start) * 1000}
+_first_frame = None
 
 __version__ = "0.0a0.dev0"
 
@@ -18,12 +25,16 @@ def check_attr(kw, attr):
     if len(bad) > 0:
         throw("invalid argument(s):", bad)
 
-def init(size=(0, 0), caption=None, icon=None, fps=60, appcls=None, ime=True, **kw):
+def init(size=(0, 0), caption=None, icon=None, fps=60, appcls=None, ime=True, headless=None,
+         record=None, replay=None, **kw):
     '''Initialize and set the pygame window'''
     global app, clock, game_fps
 
     if ime:
         os.environ["SDL_IME_SHOW_UI"] = str(ime)
+    if headless is None:
+        headless = bool(os.environ.get("EPG_HEADLESS"))
+    set_headless(headless)
     
     pg.init()
     screen = pg.display.set_mode(size, **kw)
@@ -36,6 +47,10 @@ def init(size=(0, 0), caption=None, icon=None, fps=60, appcls=None, ime=True, **
         pg.display.set_caption(caption)
     if icon:
         pg.display.set_icon(icon)
+    if record := record or os.environ.get("EPG_RECORD"):
+        input.record(record)
+    elif replay := replay or os.environ.get("EPG_REPLAY"):
+        input.replay(replay)
 
     return app
 
@@ -51,18 +66,63 @@ def get_path(relative_path):
 def get_asset(path):
     return get_path(os.path.join(assets, path))    
 
+headless = False
+sim_time = None
+def set_headless(on=True):
+    '''Run without a window on SDL's dummy drivers, driven by a synthetic clock'''
+    global headless, sim_time
+
+    headless = on
+    if on:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+        sim_time = 0
+    else:
+        sim_time = None
+
+def advance_time(ms=None):
+    '''Move the synthetic clock forward by [ms=one frame]'''
+    global sim_time
+    sim_time += 1000 / game_fps if ms is None else ms
+
+render_alpha = 1
 time_offset = 0
 def get_time():
     '''Return the game time minus the event.get() loss'''
+    if sim_time is not None:
+        return sim_time
     return pg.time.get_ticks() - time_offset
 
 def test_fps():
     '''Set the caption to FPS in order to test the game'''
     display.set_caption(str(clock.get_fps()))
 
-def update_display():
+def present(surf=None, bgcolor=(0, 0, 0), **rectkw):
+    '''Show a frame at once, e.g. while the first scene is still being built'''
+    screen = display.get_surface()
+    screen.fill(bgcolor)
+    if surf:
+        screen.blit(surf, surf.get_rect(**rectkw or {"center":screen.get_rect().center}))
+    event.pump()
+    if not headless:
+        display.flip()
+    _mark_first_frame()
+
+def _mark_first_frame():
+    global _first_frame
+    if _first_frame is None:
+        _first_frame = _perf_counter()
+
+def update_display(rects=None):
+    if _first_frame is None: _mark_first_frame()
+    if headless:
+        advance_time()
+        return
     clock.tick(game_fps)
-    display.flip()
+    if rects is None:
+        display.flip()
+    else:
+        display.update(rects)
 
 class App:
     def __init__(self, screen=None, scene=None):
@@ -98,19 +158,22 @@ class App:
         while self.app_running:
             scene = self.scene
 
-            self.scene.scene_running = True
+            self.scene.start()
             while self.scene.scene_running:
                 self.scene.single_run()
 
                 await asyncio.sleep(0)
                 
             if self.scene == scene: self.quit()
+        input.stop()
 
     def quit(self):
         self.app_running = False
         self.scene.quit()
 
     def switch(self, scene):
+        if isinstance(scene, Prewarm):
+            scene = scene.result()
         if not isinstance(scene, Scene):
             try:
                 scene = self.cached[scene]
@@ -123,31 +186,57 @@ class App:
             ##    self.scene.screen = scene.screen ## TODO
         self.scene = scene
         
-import epg.locals as locals
-import epg.collision as collision
-import epg.data as data
-import epg.math as math
-import epg.mixer as mixer
-import epg.image as image
-import epg.mask as mask
-import epg.action as action
-import epg.scene as scene
-import epg.font as font
-import epg.renderer as renderer
-import epg.sprite as sprite
-import epg.ui as ui
+def _import(name):
+    start = _perf_counter()
+    module = importlib.import_module("epg." + name)
+    _import_times.setdefault(name, (_perf_counter() - start) * 1000)
+    return module
+
+locals = _import("locals")
+math = _import("math")
+image = _import("image")
+font = _import("font")
+action = _import("action")
+profiler = _import("profiler")
+input = _import("input")
+sprite = _import("sprite")
+scene = _import("scene")
 
 from .font import text_render
-from .scene import Scene, AScene
-from .sprite import Sprite, Static, AStatic, Dynamic, ADynamic, OsDynamic, OsADynamic
-from .mixer import MusicManager, play_music, play_sound
+from .scene import Scene, AScene, Prewarm
+from .sprite import Sprite, Static, AStatic, Dynamic, ADynamic, OsDynamic, OsADynamic, Camera
 from .image import Animation, SpriteSheet, FileSheet, load_sheet
 
 load_font = font.load
 get_image = image.get
+get_transformed = image.get_transformed
 load_image = image.load
-get_mask = mask.get
 get_sprite = sprite.get
 
+_LAZY_MODULES = ("collision", "data", "mask", "mixer", "particles", "projectiles", "renderer", "ui")
+_LAZY_ATTRS = {"MusicManager":("mixer", "MusicManager"), "play_music":("mixer", "play_music"),
+               "play_sound":("mixer", "play_sound"), "get_mask":("mask", "get")}
+for _name in _LAZY_MODULES:
+    globals().pop(_name, None) # shadowed pygame modules
+_import_times["epg"] = (_perf_counter() - _import_start) * 1000
+
+def __getattr__(name):
+    '''Import the rarely needed submodules on first access'''
+    if name in _LAZY_MODULES:
+        return _import(name)
+    if name in _LAZY_ATTRS:
+        module, attr = _LAZY_ATTRS[name]
+        value = globals()[name] = getattr(_import(module), attr)
+        return value
+    raise AttributeError(f"module 'epg' has no attribute {name!r}")
+
+def startup_report():
+    '''Return the import times of pygame and the epg modules and the time to the first frame'''
+    lines = [f"{name:<12}{ms:>9.2f} ms" + (" (lazy)" if name in _LAZY_MODULES else "")
+             for name, ms in _import_times.items()]
+    if _first_frame is not None:
+        lines.append(f"{'first frame':<12}{(_first_frame - _import_start) * 1000:>9.2f} ms")
+    return "\n".join(lines)
+
 assets = ""
 attr = {}
\ No newline at end of file
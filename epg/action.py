@@ -1,64 +1,159 @@
 import epg
 import math
+from heapq import heappush, heappop, heapify
 from functools import partial
 
+frame_time = None
+def get_time():
+    '''Return the time the scene set for the current frame, so that every action advances from
+    one timestamp, or epg.get_time() outside the scene update'''
+    return epg.get_time() if frame_time is None else frame_time
+
 class ActionManager:
     def __init__(self, sprite, actions, end_func=None, cover=True):
         self.sprite = sprite
+        self.sprite.manager = self # the actions report their sleep time through it from the first update
         self.sprite.orig_image = sprite.image
         self.sprite.orig_rect = sprite.rect
+        self.wake, self.busy = None, False
 
+        self.program = self.generator = None
         if actions and actions[0]:
-            self.actions = AsyncActions(list=actions).copy()
-            self.generator = self.actions.generate(sprite)
-            self.generator.send(None)
+            program = get_program(actions)
+            self.actions = program.actions
+            if program.segments is None:
+                self.generator = program.generate(sprite)
+                self.generator.send(None)
+            else:
+                # The whole running state of a compiled program
+                self.program, self.pc, self.loop, self.live = program, 0, 0, []
+                self.start_time = get_time()
         else:
-            self.actions, self.generator = None, None
+            self.actions = None
             
         self.end_func = end_func
         self.cover = cover
         self.covers = []
+        self.cover_cache = None
         self.update()
 
     def __bool__(self):
-        return bool(self.generator)
+        return bool(self.generator) or self.program is not None
 
     def add_cover(self, func):
         if func: self.covers.append(func)
 
     def clear_cover(self):
         self.covers.clear()
+        self.cover_cache = None
         self.sprite.image, self.sprite.rect = self.sprite.orig_image.copy(), self.sprite.orig_rect.copy()
 
     def update_cover(self):
-        upd = self.sprite.orig_image, self.sprite.orig_rect
-        for func in self.covers:
-            upd = func(*upd)
-        return upd
+        '''Return the original image and rect with the settled covers applied. The result is cached,
+        so only covers added since the last call are applied, unless the originals changed'''
+        image, rect = self.sprite.orig_image, self.sprite.orig_rect
+        cache = self.cover_cache
+        if cache is None or cache[0] is not image or cache[1] != rect:
+            cache = (image, rect.copy(), 0, (image, rect))
+
+        upd, n = cache[3], cache[2]
+        if n < len(self.covers):
+            for func in self.covers[n:]:
+                upd = func(*upd)
+            cache = (image, cache[1], len(self.covers), upd)
+        self.cover_cache = cache
+        return upd[0], upd[1].copy() # the live action and the game may change the rect
+
+    def sleep(self, until):
+        '''Called by a waiting action: nothing needs an update before the time unless another action is busy'''
+        if self.wake is None or until < self.wake:
+            self.wake = until
+
+    @property
+    def wake_time(self):
+        '''The time of the next needed update, None if every frame needs one'''
+        return None if self.busy else self.wake
 
     def recover(self):
         self.covers.clear()
+        self.cover_cache = None
         for action in self.actions.all:
             if action.cover:
-                self.covers.append(action.get_cover(self.sprite))
+                self.covers.append(action.copy().get_cover(self.sprite))
 
     def update(self):
-        if self.generator:
+        if self.generator or self.program:
+            if (wake := self.wake_time) is not None and get_time() < wake:
+                cache = self.cover_cache
+                if cache[0] is self.sprite.orig_image and cache[1] == self.sprite.orig_rect:
+                    return
+            if self.program:
+                self.run_program()
+                return
             upd_c = self.update_cover()
 
+            self.wake, self.busy = None, False
             try:
                 upd = self.generator.send(upd_c)
             except StopIteration:
-                self.generator = None
-                if not self.cover: self.clear_cover()
-                self.sprite.orig_image, self.sprite.orig_rect = None, None
-                if self.end_func:
-                    self.end_func(self.sprite, self.actions)
-                return
+                self.finish()
             else:
                 if upd: self.sprite.image, self.sprite.rect = upd
 
+    def run_program(self):
+        '''Start the segments due by now, settle the finished ones into covers and apply the running ones'''
+        program, sprite = self.program, self.sprite
+        segments, live = program.segments, self.live
+        now = get_time() - self.start_time
+        while True:
+            while self.pc < len(segments) and segments[self.pc][0] <= now:
+                start, duration, order, action = segments[self.pc]
+                self.pc += 1
+                if isinstance(action, SpecialAction):
+                    next(action.single_generate(sprite), None)
+                    if isinstance(action, (Kill, Switch)) or sprite.manager is not self:
+                        return # the sprite or the scene is gone, or a Call started new actions
+                    continue
+                if not action.SHARED:
+                    action = action.copy()
+                    action.init(sprite)
+                live.append((order, start + duration, start, action))
+                live.sort()
+
+            for item in [item for item in live if item[1] <= now]:
+                live.remove(item)
+                self.add_cover(item[3].get_cover(sprite))
+
+            if self.pc == len(segments) and not live and now >= program.length:
+                self.loop += 1
+                if self.loop >= program.total:
+                    sprite.image, sprite.rect = self.update_cover()
+                    self.finish()
+                    return
+                self.start_time += program.length
+                now -= program.length
+                self.pc = 0
+                continue
+            break
+
+        upd = self.update_cover()
+        for order, end, start, action in live:
+            upd = action.get((now - start) / (end - start), *upd)
+        sprite.image, sprite.rect = upd
+
+        self.busy = bool(live)
+        self.wake = self.start_time + (segments[self.pc][0] if self.pc < len(segments) else program.length)
+
+    def finish(self):
+        self.generator = self.program = None
+        if not self.cover: self.clear_cover()
+        self.sprite.orig_image, self.sprite.orig_rect = None, None
+        if self.end_func:
+            self.end_func(self.sprite, self.actions)
+
 class ActionObject: # TODO: action sprite bind
+    __slots__ = ()
+
     def __init__(self, actions, end_func):
         self.end_func = end_func
         self.manager = None
@@ -88,6 +183,8 @@ class ActionObject: # TODO: action sprite bind
 class BaseAction:
     ATTR = {}
     COVER = False
+    KEYFRAMES = True # get() is a pure function of pos, so the action can be compiled into segments
+    SHARED = True # a compiled program may run the same instance for every sprite
     def __init__(self, duration=0, interval=0, total=1, interp=epg.math.mix, cover=None, **kw):
         epg.check_attr(kw, self.ATTR)
 
@@ -176,19 +273,23 @@ class BaseAction:
             
     def single_generate(self, s):
         pos = 0
+        manager = s.manager
         upd = yield
+        manager.busy = True
         upd = yield self.get(0, *upd)
         
-        self.start_time = self.last_update = epg.get_time()
+        self.start_time = self.last_update = get_time()
         while self.duration and pos < 1:
-            now = epg.get_time()
+            now = get_time()
             if now - self.last_update > self.interval:
                 self.last_update = now
                 pos = (now - self.start_time) / self.duration
                 if pos > 1: pos = 1
+            manager.busy = True
             upd = yield self.get(pos, *upd)
 
         s.add_cover(self.get_cover(s))
+        manager.busy = True
         yield self.get(1, *upd)
 
     def get_cover(self, s):
@@ -203,8 +304,13 @@ class BaseAction:
 
 class SpecialAction(BaseAction):
     def generate(self, sprite):
+        # Keep the manager awake on every step, the next action starts when it is resumed
+        manager = sprite.manager
+        manager.busy = True
         yield
-        yield from self.single_generate(sprite)
+        for upd in self.single_generate(sprite):
+            manager.busy = True
+            yield upd
 
     def single_generate(self, sprite):
         pass
@@ -292,6 +398,107 @@ class BaseActions(BaseAction):
         for a in self.actions:
             self.append(a)
 
+class Program:
+    '''An action expression compiled once and shared by every sprite running it.
+
+    When every action is a plain timed one or an instant Call/Clear/Kill/Switch, the expression
+    becomes segments (start, duration, order, action) on one timeline, and a sprite only keeps a
+    program counter, a start time and its running segments. Actions with their own state are copied
+    when their segment starts. Unlike the generators, the steps follow each other without idle frames.
+    Other expressions run as a pre-flattened sequence of steps through the action generators.
+    The expression must not be changed after compiling'''
+    MAX_UNROLL = 32
+    MAX_SEGMENTS = 256
+
+    def __init__(self, actions):
+        if len(actions) == 1 and type(actions[0]) is AsyncActions:
+            self.actions = actions[0]
+        else:
+            self.actions = AsyncActions(list=list(actions))
+        self.total = self.actions.total
+        self.steps = tuple(self.flatten(self.actions))
+        self.segments, self.length = self.compile(self.actions)
+
+    def compile(self, actions):
+        '''Return the segments of one run sorted by start and its length, or (None, 0)'''
+        segments, end = [], 0
+        for a in actions:
+            end = self.compile_action(a, end, segments)
+            if end is None or len(segments) > self.MAX_SEGMENTS:
+                return None, 0
+        if self.total > 1 and end <= 0:
+            return None, 0
+        segments.sort(key=lambda segment: segment[0]) # stable, the order of equal starts is kept
+        return tuple(segments), end
+
+    def compile_action(self, action, start, segments):
+        cls = type(action)
+        if cls is AsyncActions:
+            if action.total == math.inf:
+                return None
+            for i in range(math.ceil(action.total)):
+                for a in action:
+                    start = self.compile_action(a, start, segments)
+                    if start is None:
+                        return None
+            return start
+        elif cls is SyncActions:
+            if action.total != 1:
+                return None
+            end = start
+            for a in action:
+                e = self.compile_action(a, start, segments)
+                if e is None:
+                    return None
+                end = max(end, e)
+            return end
+        elif isinstance(action, (Call, Clear, Kill, Switch)) and cls.generate is SpecialAction.generate:
+            segments.append((start, 0, len(segments), action))
+            return start
+        elif isinstance(action, (SpecialAction, BaseActions)) or not action.KEYFRAMES or action.interval \
+            or cls.generate is not BaseAction.generate:
+            return None
+        elif cls.single_generate is Delay.single_generate:
+            return start + math.ceil(action.total) * action.duration
+        elif cls.single_generate is not BaseAction.single_generate:
+            return None
+
+        for i in range(math.ceil(action.total)):
+            segments.append((start, action.duration, len(segments), action))
+            start += action.duration
+        return start
+
+    def flatten(self, actions):
+        steps = []
+        for a in actions:
+            # A nested sequence runs exactly like its steps inlined, repeated total times
+            if type(a) is AsyncActions and a.total * len(a["list"]) <= self.MAX_UNROLL:
+                steps.extend(self.flatten(a) * math.ceil(a.total)) # "while i < total" runs ceil(total) times
+            else:
+                steps.append(a)
+        return steps
+
+    def generate(self, sprite):
+        i = 0
+        while i < self.total:
+            for step in self.steps:
+                if not isinstance(step, SpecialAction):
+                    step = step.copy()
+                yield from step.generate(sprite)
+                sprite.manager.busy = True # the next step starts now
+            i += 1
+
+def get_program(actions):
+    '''Return the program of the actions passed to act(), cached on a single expression'''
+    if len(actions) != 1:
+        return Program(actions)
+    action = actions[0]
+    try:
+        return action._program
+    except AttributeError:
+        action._program = Program(actions)
+        return action._program
+
 class SyncActions(BaseActions):
     def generate(self, sprite):
         i = 0
@@ -318,6 +525,7 @@ class AsyncActions(BaseActions):
         while i < self.total:
             for a in self["list"]:
                 yield from a.generate(sprite)
+                sprite.manager.busy = True
             i += 1
 
 class Call(SpecialAction):
@@ -351,16 +559,50 @@ class Remain(SpecialAction):
 
 class Act(BaseAction):
     ATTR = {"func":None}
+    KEYFRAMES = False
     def get(self, pos, *args):
         if f := self["func"]: f(pos, *args)
 
 class Delay(BaseAction):
-    pass
+    def single_generate(self, s):
+        # Nothing changes while waiting, so let the manager sleep until the end.
+        # The frames are the same as those of BaseAction.single_generate
+        manager = s.manager
+        upd = yield
+        manager.busy = True
+        upd = yield upd
+
+        self.start_time = get_time()
+        end = self.start_time + self.duration
+        while self.duration:
+            if get_time() < end:
+                manager.sleep(end)
+                upd = yield upd
+            else:
+                manager.busy = True
+                upd = yield upd
+                break
+        manager.busy = True
+        yield upd
 
 class Fade(BaseAction):
     ATTR = {"range":(0, 255)}
     COVER = True
+    SHARED = False
+    source, scratch = None, None
     def get(self, pos, im, rect):
+        # Reuse one copy of the source while it stays the same and only change its alpha
+        if im is not self.source:
+            self.source, self.scratch = im, im.copy()
+        self.scratch.set_alpha(self.get_mixture(pos))
+        return self.scratch, rect
+
+    def get_cover(self, s):
+        self.init(s)
+        return partial(self.fade, 1)
+
+    def fade(self, pos, im, rect):
+        '''Return a new faded copy, for covers that outlive the scratch surface'''
         surf = im.copy()
         surf.set_alpha(self.get_mixture(pos))
         return surf, rect
@@ -372,10 +614,17 @@ class FadeOut(Fade):
     ATTR = {"range":(255, 0)}
 
 class Transform(BaseAction):
-    ATTR = {"range":(1, 2), "anchor":"center", "func":epg.transform.scale_by}
+    ATTR = {"range":(1, 2), "anchor":"center", "func":epg.transform.scale_by, "steps":None}
     COVER = True
     def get(self, pos, im, rect):
-        surf = self["func"](im, self.get_mixture(pos))
+        if steps := self["steps"]:
+            # Snap to one of steps + 1 frames, shared through the image cache by every sprite with this image
+            value = self.get_mixture(round(pos * steps) / steps)
+            if isinstance(value, list):
+                value = tuple(value)
+            surf = epg.image.get_applied(im, self["func"], value)
+        else:
+            surf = self["func"](im, self.get_mixture(pos))
         new_rect = surf.get_rect()
         setattr(new_rect, self["anchor"], getattr(rect, self["anchor"]))
         return surf, new_rect
@@ -384,7 +633,8 @@ class ScaleBy(Transform):
     pass
 
 class ScaleTo(Transform):
-    ATTR = {"range":(0, 0), "anchor":"center", "func":epg.transform.scale}
+    ATTR = {"range":(0, 0), "anchor":"center", "func":epg.transform.scale, "steps":None}
+    SHARED = False
     def init(self, s):
         d = self.orig_kw
         x = d.copy()
@@ -397,7 +647,7 @@ class ScaleTo(Transform):
                 self["range"][i] = s.orig_rect.size
 
 class Rotate(Transform):
-    ATTR = {"range":(0, 360), "anchor":"center", "func":epg.transform.rotate}
+    ATTR = {"range":(0, 360), "anchor":"center", "func":epg.transform.rotate, "steps":None}
 
 class Flip(BaseAction):
     ATTR = {"x":True, "y":False}
@@ -408,6 +658,7 @@ class Flip(BaseAction):
 class MoveBy(BaseAction):
     ATTR = {"range":(0, 0)}
     COVER = True
+    SHARED = False
     def init(self, s):
         d = self.orig_kw
         if isinstance(d["range"][0], int):
@@ -419,6 +670,7 @@ class MoveBy(BaseAction):
 class MoveTo(BaseAction):
     ATTR = {"range":(0, 0), "anchor":"topleft"}
     COVER = True
+    SHARED = False
     def init(self, s):
         d = self.orig_kw
         x = d.copy()
@@ -437,6 +689,7 @@ class MoveTo(BaseAction):
 class Erase(BaseAction):
     ATTR = {"range":((0, 0), (1, 0)), "anchor":"topleft", "size":(1, 1), 
     "eraser":None, "fill":True}
+    SHARED = False
     def init(self, s):
         x, sz = self.orig_kw["size"], s.orig_rect.size
         self.eraser_rect = epg.Rect(0, 0, x[0]*sz[0], x[1]*sz[1])
@@ -460,3 +713,46 @@ class Shake(BaseAction):
         rect = rect.move(self["func"][0](p) * self["dist"][0],
                          self["func"][1](p) * self["dist"][1])
         return im, rect
+
+class Timeline:
+    '''Update action objects from a heap ordered by the time of their next needed update, so the ones
+    sleeping in a Delay are not touched at all. The original image of an object must not change while
+    it sleeps, and an object must be added again after a new act()'''
+    def __init__(self, *objs):
+        self.heap = []
+        self.count = 0
+        self.add(*objs)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def add(self, *objs):
+        now = get_time()
+        for obj in objs:
+            self.remove(obj)
+            heappush(self.heap, (now, self.count, obj))
+            self.count += 1
+
+    def remove(self, obj):
+        n = len(self.heap)
+        self.heap[:] = [entry for entry in self.heap if entry[2] is not obj]
+        if len(self.heap) != n:
+            heapify(self.heap)
+
+    def clear(self):
+        self.heap.clear()
+
+    def update(self):
+        now = get_time()
+        heap, due = self.heap, []
+        while heap and heap[0][0] <= now:
+            due.append(heappop(heap))
+
+        for _, n, obj in due:
+            if obj.manager:
+                obj.manager.update()
+            manager = obj.manager
+            if not manager or (hasattr(obj, "alive") and not obj.alive()):
+                continue
+            wake = manager.wake_time
+            heappush(heap, (now if wake is None else wake, n, obj))
@@ -1,8 +1,13 @@
 import epg
 
+try:
+	import numpy as np
+except ImportError:
+	np = None
+
 def colliderect(rect1, rect2, mask1=None, mask2=None, **maskkw):
 	if not mask1: mask1 = epg.get_mask(rect1, **maskkw)
-	if not mask2: mask2 = epg.get_mask(mask2, **maskkw)
+	if not mask2: mask2 = epg.get_mask(rect2, **maskkw)
 	return mask1.overlap(mask2, (rect2[0] - rect1[0], rect2[1] - rect1[1]))
 
 def collidepoint(rect, point, mask=None, **maskkw):
@@ -11,3 +16,156 @@ def collidepoint(rect, point, mask=None, **maskkw):
 		return mask.get_at((point[0] - rect[0], point[1] - rect[1]))
 	except IndexError:
 		return False
+
+def _require_numpy():
+	if np is None:
+		epg.throw("numpy is required for bulk collision queries")
+
+def to_array(rects):
+	'''Return an (n, 4) float array of x, y, w, h'''
+	_require_numpy()
+	if isinstance(rects, np.ndarray):
+		return rects.reshape(-1, 4).astype(float, copy=False)
+	return np.array([tuple(r) for r in rects], float).reshape(-1, 4)
+
+def snapshot(group):
+	'''Return (sprites, rects array) of a group, in the same order'''
+	sprites = group.sprites()
+	return sprites, to_array([s.rect for s in sprites])
+
+def collide_rects(rects1, rects2, masks1=None, masks2=None):
+	'''Return the index arrays (i, j) of all overlapping pairs of rects1[i] and rects2[j].
+	If masks are given, only the pairs that pass the rect test are checked against them'''
+	a, b = to_array(rects1), to_array(rects2)
+	x1, y1, w1, h1 = (c[:, None] for c in a.T)
+	x2, y2, w2, h2 = b.T
+	hit = (x1 < x2 + w2) & (x2 < x1 + w1) & (y1 < y2 + h2) & (y2 < y1 + h1)
+	hit &= (w1 > 0) & (h1 > 0) & (w2 > 0) & (h2 > 0)
+	i, j = np.nonzero(hit)
+	if masks1 is None and masks2 is None:
+		return i, j
+
+	keep = np.zeros(len(i), bool)
+	offsets = (b[j, :2] - a[i, :2]).astype(int)
+	for k, (ii, jj) in enumerate(zip(i.tolist(), j.tolist())):
+		m1 = masks1[ii] if masks1 is not None else None
+		m2 = masks2[jj] if masks2 is not None else None
+		m1 = m1 or epg.mask.get(epg.Rect(a[ii].tolist()))
+		m2 = m2 or epg.mask.get(epg.Rect(b[jj].tolist()))
+		keep[k] = m1.overlap(m2, offsets[k].tolist()) is not None
+	return i[keep], j[keep]
+
+def collide_points(rects, points, masks=None):
+	'''Return the index arrays (i, j) of all points[j] inside rects[i], checked against masks[i] if given'''
+	a = to_array(rects)
+	p = np.asarray(points, float).reshape(-1, 2)
+	x, y, w, h = (c[:, None] for c in a.T)
+	px, py = p.T
+	i, j = np.nonzero((x <= px) & (px < x + w) & (y <= py) & (py < y + h))
+	if masks is None:
+		return i, j
+
+	keep = np.ones(len(i), bool)
+	offsets = (p[j] - a[i, :2]).astype(int)
+	for k, ii in enumerate(i.tolist()):
+		if masks[ii]:
+			keep[k] = bool(masks[ii].get_at(offsets[k].tolist()))
+	return i[keep], j[keep]
+
+def collide_groups(group1, group2, use_masks=False):
+	'''Return the overlapping (sprite1, sprite2) pairs of two groups, optionally checked by their masks'''
+	sprites1, rects1 = snapshot(group1)
+	sprites2, rects2 = snapshot(group2)
+	masks1 = masks2 = None
+	if use_masks:
+		masks1 = [getattr(s, "mask", None) for s in sprites1]
+		masks2 = [getattr(s, "mask", None) for s in sprites2]
+	i, j = collide_rects(rects1, rects2, masks1, masks2)
+	return [(sprites1[ii], sprites2[jj]) for ii, jj in zip(i.tolist(), j.tolist())]
+
+class CollisionWorld:
+	'''Spatial hash broadphase that tests sprite groups (layers) against each other by rules'''
+	def __init__(self, cell_size=64):
+		self.cell_size = cell_size
+		self.layers = {}
+		self.cells = {}
+		self.spans = {}
+		self.rules = []
+
+	def add_layer(self, name, group):
+		self.layers[name] = group
+		self.cells[name] = {}
+		self.spans[name] = {}
+
+	def remove_layer(self, name):
+		del self.layers[name], self.cells[name], self.spans[name]
+		self.rules = [r for r in self.rules if name not in r[:2]]
+
+	def add_rule(self, layer_a, layer_b, callback, test=None):
+		'''Call callback([(a, b), ...]) once per step with the overlapping pairs of the two layers.
+		test(a, b) refines the rect overlap, e.g. with masks'''
+		for name in (layer_a, layer_b):
+			if name not in self.layers:
+				epg.throw("unknown collision layer", name)
+		self.rules.append((layer_a, layer_b, callback, test))
+
+	def get_span(self, rect):
+		size = self.cell_size
+		return int(rect[0] // size), int(rect[1] // size), int((rect[0] + rect[2]) // size), int((rect[1] + rect[3]) // size)
+
+	def update(self):
+		'''Move the sprites that changed cells since the last update and drop the killed ones'''
+		for name, group in self.layers.items():
+			cells, spans = self.cells[name], self.spans[name]
+			alive = group.spritedict
+			for sprite in [s for s in spans if s not in alive]:
+				self._remove(cells, sprite, spans.pop(sprite))
+			for sprite in alive:
+				span = self.get_span(sprite.rect)
+				old = spans.get(sprite)
+				if span == old:
+					continue
+				if old:
+					self._remove(cells, sprite, old)
+				spans[sprite] = span
+				for x in range(span[0], span[2] + 1):
+					for y in range(span[1], span[3] + 1):
+						if (x, y) in cells:
+							cells[x, y][sprite] = None
+						else:
+							cells[x, y] = {sprite:None}
+
+	def _remove(self, cells, sprite, span):
+		for x in range(span[0], span[2] + 1):
+			for y in range(span[1], span[3] + 1):
+				cell = cells[x, y]
+				del cell[sprite]
+				if not cell:
+					del cells[x, y]
+
+	def query(self, rect, layer):
+		'''Return the sprites of the layer whose rects collide with rect'''
+		cells = self.cells[layer]
+		x0, y0, x1, y1 = self.get_span(rect)
+		found = {}
+		for x in range(x0, x1 + 1):
+			for y in range(y0, y1 + 1):
+				if (x, y) in cells:
+					found.update(cells[x, y])
+		alive = self.layers[layer].spritedict
+		return [s for s in found if s in alive and s.rect.colliderect(rect)]
+
+	def get_pairs(self, layer_a, layer_b, test=None):
+		pairs = []
+		for a in self.layers[layer_a]:
+			for b in self.query(a.rect, layer_b):
+				if b is not a and (not test or test(a, b)):
+					pairs.append((a, b))
+		return pairs
+
+	def step(self):
+		'''Update the hash and run every rule. Callbacks should check alive(), as earlier ones may kill sprites'''
+		self.update()
+		for layer_a, layer_b, callback, test in self.rules:
+			if pairs := self.get_pairs(layer_a, layer_b, test):
+				callback(pairs)
@@ -1,6 +1,9 @@
 import pygame as pg
 import epg
+import weakref
+from collections import OrderedDict
 from functools import lru_cache, partial
+from concurrent.futures import ThreadPoolExecutor
 from pygame.image import *
 
 def load_transformed(name, scale_by=None, flip=None, rotate=None, gpath=epg.get_asset):
@@ -38,6 +41,95 @@ def loads(name, start=0, stop=None, step=1, load=load, **loadkw):
 get = lru_cache(256)(load_transformed)
 gets = partial(loads, load=get)
 
+_executor = None
+def preload(*names):
+    '''Decode images into the get() cache on a worker thread and return the future.
+    A name may also be a (name, kwargs) pair for get(name, **kwargs)'''
+    global _executor
+    if not _executor:
+        _executor = ThreadPoolExecutor(2, thread_name_prefix="epg-preload")
+    return _executor.submit(_preload, names)
+
+def _preload(names):
+    return [get(name) if isinstance(name, str) else get(name[0], **name[1]) for name in names]
+
+transform_max_bytes = 32 * 1024 * 1024
+angle_step = 1
+transform_hits = transform_misses = 0
+
+_transforms = OrderedDict()
+_transform_bytes = 0
+_baked_steps = weakref.WeakKeyDictionary()
+
+def get_transformed(surf, angle=0, flip=None, scale_by=None, step=None):
+    '''Return surf scaled, flipped and rotated by angle (rounded to step degrees) from an LRU cache
+    bounded by transform_max_bytes. The result is shared, so copy it before drawing on it'''
+    global transform_hits, transform_misses
+    step = step or _baked_steps.get(surf) or angle_step
+    angle = round(angle / step) * step % 360
+    flip = (bool(flip[0]), bool(flip[1])) if flip and any(flip) else None
+    if not (angle or flip or scale_by):
+        return surf
+
+    key = (id(surf), angle, flip, scale_by)
+    if entry := _transforms.get(key):
+        transform_hits += 1
+        _transforms.move_to_end(key)
+        return entry[1]
+
+    transform_misses += 1
+    result = surf
+    if scale_by:
+        result = pg.transform.scale_by(result, scale_by)
+    if flip:
+        result = pg.transform.flip(result, *flip)
+    if angle:
+        result = pg.transform.rotate(result, angle)
+    return _store_transform(key, surf, result)
+
+def get_applied(surf, func, arg):
+    '''Return func(surf, arg) from the same cache as get_transformed. arg must be hashable.
+    The alpha of surf is part of the key, because the result inherits it'''
+    global transform_hits, transform_misses
+    key = (id(surf), surf.get_alpha(), func, arg)
+    if entry := _transforms.get(key):
+        transform_hits += 1
+        _transforms.move_to_end(key)
+        return entry[1]
+
+    transform_misses += 1
+    return _store_transform(key, surf, func(surf, arg))
+
+def _store_transform(key, surf, result):
+    global _transform_bytes
+    nbytes = result.get_width() * result.get_height() * result.get_bytesize()
+    # Drop the entry with its source, so a reused id never hits it
+    ref = weakref.ref(surf, lambda r, key=key: _discard_transform(key))
+    _transforms[key] = (ref, result, nbytes)
+    _transform_bytes += nbytes
+    while _transform_bytes > transform_max_bytes and len(_transforms) > 1:
+        _discard_transform(next(iter(_transforms)))
+    return result
+
+def _discard_transform(key):
+    global _transform_bytes
+    if entry := _transforms.pop(key, None):
+        _transform_bytes -= entry[2]
+
+def bake(surf, n=36, flip=None, scale_by=None):
+    '''Render n evenly spaced rotations of surf now, and round its later angles to them'''
+    _baked_steps[surf] = 360 / n
+    return [get_transformed(surf, 360 / n * i, flip, scale_by) for i in range(n)]
+
+def clear_transforms():
+    for key in list(_transforms):
+        _discard_transform(key)
+
+def transform_stats():
+    total = transform_hits + transform_misses
+    return {"hits":transform_hits, "misses":transform_misses, "hit_rate":transform_hits / total if total else 0,
+            "entries":len(_transforms), "bytes":_transform_bytes, "max_bytes":transform_max_bytes}
+
 def load_sheet(name, x=None, y=None, tile=None, id=0, load=load, **loadkw):
     return SpriteSheet(load(name, **loadkw), x, y, tile, id)
 
@@ -0,0 +1,137 @@
+import pygame as pg
+import epg
+import random
+import pickle
+import zlib
+
+VERSION = 1
+
+pressed = None
+mouse_pos = None
+
+def get_pressed():
+    '''Return the keyboard state of the current frame'''
+    return pg.key.get_pressed() if pressed is None else pressed
+
+def get_mouse_pos():
+    '''Return the mouse position of the current frame'''
+    return pg.mouse.get_pos() if mouse_pos is None else mouse_pos
+
+class Source:
+    '''Read the input of each frame from SDL'''
+    def begin_frame(self):
+        return pg.key.get_pressed(), pg.mouse.get_pos()
+
+    def get_events(self):
+        return pg.event.get()
+
+    def close(self):
+        pass
+
+class Recorder(Source):
+    '''Record the input, the frame times and the RNG seed of a session'''
+    def __init__(self, path, seed=None):
+        self.path = path
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.frames = []
+        self.nkeys = 0
+        random.seed(self.seed)
+
+    def begin_frame(self):
+        keys, pos = super().begin_frame()
+        # Freeze the game time for the whole frame so that the replay sees the same values
+        now = epg.get_time() if epg.headless else pg.time.get_ticks() - epg.time_offset
+        epg.sim_time = now
+
+        self.nkeys = len(keys)
+        self.frames.append([now, _get_scancodes(keys), pos, ()])
+        return keys, pos
+
+    def get_events(self):
+        events = super().get_events()
+        if self.frames:
+            self.frames[-1][3] = tuple((e.type, _get_dict(e)) for e in events)
+        return events
+
+    def close(self):
+        data = {"version":VERSION, "seed":self.seed, "nkeys":self.nkeys, "frames":self.frames}
+        with open(self.path, "wb") as f:
+            f.write(zlib.compress(pickle.dumps(data)))
+
+class Replayer(Source):
+    '''Feed a recorded session back frame by frame, then call end_func (quit the app by default)'''
+    def __init__(self, path, end_func=None):
+        with open(path, "rb") as f:
+            data = pickle.loads(zlib.decompress(f.read()))
+        if data["version"] != VERSION:
+            epg.throw("unsupported replay version", data["version"])
+
+        self.seed, self.nkeys, self.frames = data["seed"], data["nkeys"], data["frames"]
+        self.index = 0
+        self.events = ()
+        self.end_func = end_func
+        random.seed(self.seed)
+
+    @property
+    def finished(self):
+        return self.index >= len(self.frames)
+
+    def begin_frame(self):
+        if self.finished:
+            stop()
+            (self.end_func or epg.app.quit)()
+            return super().begin_frame()
+
+        now, down, pos, self.events = self.frames[self.index]
+        self.index += 1
+        epg.sim_time = now
+
+        keys = [False] * self.nkeys
+        for i in down:
+            keys[i] = True
+        return pg.key.ScancodeWrapper(keys), pos
+
+    def get_events(self):
+        # Drain the OS queue so that the window keeps responding, but only let a real QUIT through
+        real = [e for e in pg.event.get() if e.type == pg.QUIT]
+        events, self.events = self.events, ()
+        return [pg.event.Event(type, d) for type, d in events] + real
+
+source = Source()
+
+def begin_frame():
+    '''Take the keyboard and mouse state of a new frame'''
+    global pressed, mouse_pos
+    pressed, mouse_pos = source.begin_frame()
+
+def get_events():
+    return source.get_events()
+
+def record(path, seed=None):
+    '''Seed the global RNG and record the session to path until stop()'''
+    global source
+    stop()
+    source = Recorder(path, seed)
+    return source
+
+def replay(path, end_func=None):
+    '''Reseed the global RNG and replay the session recorded to path'''
+    global source
+    stop()
+    source = Replayer(path, end_func)
+    return source
+
+def stop():
+    global source
+    source.close()
+    if type(source) is not Source and not epg.headless:
+        epg.sim_time = None
+    source = Source()
+
+def _get_scancodes(keys):
+    # Indexing a ScancodeWrapper maps keycodes to scancodes and iterating it is not supported,
+    # so read the raw scancode states as a plain tuple
+    return tuple(i for i, down in enumerate(tuple.__iter__(keys)) if down)
+
+def _get_dict(event):
+    return {k:v for k, v in event.dict.items() if isinstance(v, (int, float, str, bool, tuple, type(None)))}
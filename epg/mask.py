@@ -1,16 +1,84 @@
 import epg
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
 from pygame.mask import *
 
+max_bytes = 8 * 1024 * 1024
+hits = misses = 0
+
+_cache = OrderedDict()
+_bytes = 0
+
 def get(obj, fill=True, threshold=127):
-	if isinstance(obj, epg.Rect):
-		return Mask(obj.size, fill=True)
+	'''Return the mask of a rect or surface, cached by surface identity and threshold (treat it as read-only)'''
+	if isinstance(obj, (epg.Rect, epg.FRect)):
+		return get_rect_mask((int(obj[2]), int(obj[3])))
 	elif isinstance(obj, epg.Surface):
-		return from_surface(obj, threshold=threshold)
-	elif not isinstance(obj, Mask):
-		epg.throw("invalid type", repr(type(obj)))
+		return _get_surface_mask(obj, threshold)
+	elif isinstance(obj, Mask):
+		return obj
+	epg.throw("invalid type", repr(type(obj)))
+
+@lru_cache(64)
+def get_rect_mask(size):
+	return Mask(size, fill=True)
+
+def _get_surface_mask(surf, threshold):
+	global hits, misses, _bytes
+	key = (id(surf), threshold)
+	if entry := _cache.get(key):
+		hits += 1
+		_cache.move_to_end(key)
+		return entry[1]
+
+	misses += 1
+	mask = from_surface(surf, threshold=threshold)
+	nbytes = surf.width * surf.height // 8 + 1
+	# The weakref callback drops the entry when the surface dies, so a reused id can never hit it
+	ref = weakref.ref(surf, lambda r, key=key: _discard(key))
+	_cache[key] = (ref, mask, nbytes)
+	_bytes += nbytes
+	while _bytes > max_bytes and len(_cache) > 1:
+		_discard(next(iter(_cache)))
+	return mask
+
+def _discard(key):
+	global _bytes
+	if entry := _cache.pop(key, None):
+		_bytes -= entry[2]
+
+def invalidate(surf=None):
+	'''Forget the cached masks of a surface modified in place, or all of them'''
+	if surf is None:
+		for key in list(_cache):
+			_discard(key)
+	else:
+		for key in [k for k in _cache if k[0] == id(surf)]:
+			_discard(key)
+
+def stats():
+	total = hits + misses
+	return {"hits":hits, "misses":misses, "hit_rate":hits / total if total else 0,
+			"entries":len(_cache), "bytes":_bytes, "max_bytes":max_bytes}
+
+@lru_cache(64)
+def _get_shaped_mask(size, func, threshold, args, kw):
+	surf = epg.Surface(size, epg.SRCALPHA)
+	func(surf, (255, 255, 255), *args, **dict(kw))
+	return from_surface(surf, threshold=threshold)
 
 def get_shaped_mask(size, func, fill=True, threshold=127, *args, **kw):
-	surf = epg.Surface(size).convert_alpha()
-	surf.fill(0, 0, 0, 0)
-	func(surf, (255, 255, 255), *args, **kw)
-	return get_mask(surf, fill, threshold)
+	'''Return the mask of a shape drawn by func(surf, color, *args, **kw), e.g. epg.draw.circle.
+	The mask is cached when the arguments are hashable once lists are made tuples (treat it as read-only).
+	fill is kept for compatibility with the old signature and has no effect'''
+	key = (tuple(size), func, threshold, _freeze(args), _freeze(tuple(sorted(kw.items()))))
+	try:
+		return _get_shaped_mask(*key)
+	except TypeError: # unhashable
+		return _get_shaped_mask.__wrapped__(*key)
+
+def _freeze(value):
+	if isinstance(value, (list, tuple)):
+		return tuple(_freeze(v) for v in value)
+	return value
@@ -0,0 +1,108 @@
+import pygame as pg
+import epg
+import random
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+X, Y, VX, VY, SIZE, LIFE = range(6)
+
+class ParticleSystem:
+    '''Particles stored as rows of one numpy array, updated in bulk and drawn from prebaked stamps.
+    shape is "circle" (centered, size is the radius) or "square" (topleft, size is the side)'''
+    def __init__(self, color, shape="circle", capacity=256, gravity=0, jitter=(0, 0), grow=0, decay=0, floor=None):
+        if np is None:
+            epg.throw("numpy is required by epg.particles")
+        if shape not in ("circle", "square"):
+            epg.throw("invalid particle shape", shape)
+        self.color = color
+        self.shape = shape
+        self.gravity = gravity
+        self.jitter = jitter
+        self.grow = grow
+        self.decay = decay
+        self.floor = floor
+        self.data = np.zeros((capacity, 6))
+        self.count = 0
+        self.stamps = {}
+        self.rng = np.random.default_rng(random.getrandbits(32))
+
+    def __len__(self):
+        return self.count
+
+    def _uniform(self, value, n):
+        if isinstance(value, (tuple, list)):
+            return self.rng.uniform(value[0], value[1], n)
+        return value
+
+    def emit(self, x, y, n=None, vel=((0, 0), (0, 0)), size=0, life=float("inf")):
+        '''Add n particles at x, y (numbers or arrays). vel holds the (min, max) of each component,
+        size may be a (min, max) range too'''
+        if n is None:
+            n = max(np.size(x), np.size(y))
+        if self.count + n > len(self.data):
+            data = np.zeros((max(len(self.data) * 2, self.count + n), 6))
+            data[:self.count] = self.data[:self.count]
+            self.data = data
+
+        rows = self.data[self.count:self.count + n]
+        rows[:, X] = x
+        rows[:, Y] = y
+        rows[:, VX] = self._uniform(vel[0], n)
+        rows[:, VY] = self._uniform(vel[1], n)
+        rows[:, SIZE] = self._uniform(size, n)
+        rows[:, LIFE] = life
+        self.count += n
+
+    def update(self):
+        if not self.count:
+            return
+        data = self.data[:self.count]
+        data[:, X] += data[:, VX]
+        data[:, Y] += data[:, VY]
+        data[:, VY] += self.gravity
+        if self.jitter[0]:
+            data[:, X] += self.rng.uniform(-self.jitter[0], self.jitter[0], self.count)
+        if self.jitter[1]:
+            data[:, Y] += self.rng.uniform(-self.jitter[1], self.jitter[1], self.count)
+        data[:, SIZE] += self.grow
+        data[:, LIFE] -= self.decay
+
+        dead = data[:, LIFE] <= 0
+        if self.floor is not None:
+            dead |= data[:, Y] > self.floor
+        if dead.any():
+            alive = data[~dead]
+            self.count = len(alive)
+            self.data[:self.count] = alive
+
+    def clear(self):
+        self.count = 0
+
+    def get_stamp(self, size):
+        if (stamp := self.stamps.get(size)) is None:
+            if self.shape == "circle":
+                stamp = pg.Surface((size * 2, size * 2), pg.SRCALPHA)
+                pg.draw.circle(stamp, self.color, (size, size), size)
+            else:
+                stamp = pg.Surface((size, size))
+                stamp.fill(self.color)
+            self.stamps[size] = stamp
+        return stamp
+
+    def draw(self, screen, offset=(0, 0)):
+        if not self.count:
+            return
+        if (camera := epg.sprite.camera) and camera.moved:
+            offset = camera.to_screen(offset)
+        data = self.data[:self.count]
+        sizes = data[:, SIZE].astype(int)
+        visible = sizes > 0
+        sizes = sizes[visible]
+        pos = data[visible][:, X:Y + 1] + offset
+        if self.shape == "circle":
+            pos -= sizes[:, None]
+        lookup = {size:self.get_stamp(size) for size in np.unique(sizes).tolist()}
+        screen.fblits(zip(map(lookup.__getitem__, sizes.tolist()), pos.astype(int).tolist()))
@@ -0,0 +1,100 @@
+import epg
+from time import perf_counter
+
+PHASES = ("funcs", "update", "draw", "events", "app", "display")
+COLORS = ((160, 160, 160), (0, 200, 0), (0, 120, 255), (255, 200, 0), (200, 0, 200), (255, 60, 60))
+
+active = None
+
+class Profiler:
+    def __init__(self, size=300, overlay=False, budget=None):
+        self.size = size
+        self.overlay = overlay
+        self.budget = budget
+        self.samples = {phase:[0.0] * size for phase in PHASES}
+        self.index = 0
+        self.count = 0
+        self.last = 0
+
+    def start(self):
+        for ring in self.samples.values():
+            ring[self.index] = 0.0
+        self.last = perf_counter()
+
+    def mark(self, phase):
+        '''Charge the time since the last mark to the phase'''
+        now = perf_counter()
+        self.samples[phase][self.index] += (now - self.last) * 1000
+        self.last = now
+
+    def end(self):
+        self.index = (self.index + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def clear(self):
+        for ring in self.samples.values():
+            ring[:] = [0.0] * self.size
+        self.index = self.count = 0
+
+    def get_frames(self, phase=None):
+        '''Return the samples (ms) of the phase, or the frame totals, oldest first'''
+        if phase:
+            ring = self.samples[phase]
+        else:
+            ring = [sum(x) for x in zip(*self.samples.values())]
+        if self.count < self.size:
+            return ring[:self.count]
+        return ring[self.index:] + ring[:self.index]
+
+    def stats(self):
+        '''Return {phase: {min, avg, p95, p99, max}} in ms, "total" for whole frames'''
+        result = {}
+        for phase in PHASES + ("total",):
+            values = sorted(self.get_frames(None if phase == "total" else phase))
+            if not values:
+                continue
+            n = len(values)
+            result[phase] = {"min":values[0], "avg":sum(values) / n,
+                             "p95":values[int(0.95 * (n - 1))], "p99":values[int(0.99 * (n - 1))],
+                             "max":values[-1]}
+        return result
+
+    def report(self):
+        lines = [f"{'phase':<8}{'min':>8}{'avg':>8}{'p95':>8}{'p99':>8}{'max':>8}"]
+        for phase, s in self.stats().items():
+            lines.append(f"{phase:<8}" + "".join(f"{s[k]:>8.2f}" for k in ("min", "avg", "p95", "p99", "max")))
+        return "\n".join(lines)
+
+    def draw(self, screen, height=100, scale=3):
+        '''Draw stacked per-phase bars of the recent frames, one pixel column per frame'''
+        budget = self.budget or 1000 / epg.game_fps
+        bottom = screen.get_height() - 1
+        rings = [self.get_frames(phase) for phase in PHASES]
+        for x in range(self.count):
+            y = bottom
+            for ring, color in zip(rings, COLORS):
+                h = ring[x] * scale
+                if h >= 1:
+                    epg.draw.line(screen, color, (x, y), (x, max(y - h, bottom - height)))
+                    y -= h
+        y = bottom - budget * scale
+        epg.draw.line(screen, (255, 255, 255), (0, y), (self.size, y))
+        self.last = perf_counter()
+
+def enable(size=300, overlay=False, budget=None):
+    '''Start profiling Scene.single_run and return the profiler'''
+    global active
+    active = Profiler(size, overlay, budget)
+    return active
+
+def disable():
+    global active
+    prof, active = active, None
+    return prof
+
+def stats():
+    return active.stats() if active else {}
+
+def report():
+    return active.report() if active else ""
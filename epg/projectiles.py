@@ -0,0 +1,114 @@
+import epg
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class Projectile(epg.sprite.Entity):
+    '''An entity moved by a ProjectileGroup. While it is in one, vel is stored in the group's arrays,
+    so assign it (vel = ..., vel *= 2) rather than changing its components in place.
+    Override update() for per-object behavior, it runs before the group moves the projectiles'''
+    __slots__ = ("_vel", "_pgroup")
+
+    def __init__(self, *groups):
+        self._vel = epg.Vector2()
+        self._pgroup = None
+        super().__init__(*groups)
+
+    @property
+    def vel(self):
+        if self._pgroup is not None:
+            return epg.Vector2(self._pgroup.get_vel(self))
+        return self._vel
+
+    @vel.setter
+    def vel(self, value):
+        if self._pgroup is not None:
+            self._pgroup.set_vel(self, value)
+        else:
+            self._vel = epg.Vector2(value)
+
+    def update(self):
+        pass
+
+class ProjectileGroup(epg.sprite.Group):
+    '''A group that keeps the positions, sizes and velocities of its projectiles in numpy arrays,
+    moves them all in one step and kills the ones that left bounds'''
+    def __init__(self, *sprites, bounds=None, capacity=64):
+        if np is None:
+            epg.throw("numpy is required by epg.projectiles")
+        self.bounds = epg.Rect(bounds) if bounds else None
+        self.pos = np.zeros((capacity, 2))
+        self.size = np.zeros((capacity, 2))
+        self.vels = np.zeros((capacity, 2))
+        self.order = []
+        self.rows = {}
+        self.hooked = {}
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite)
+        n = len(self.order)
+        if n == len(self.pos):
+            for name in ("pos", "size", "vels"):
+                data = np.zeros((n * 2, 2))
+                data[:n] = getattr(self, name)
+                setattr(self, name, data)
+        rect = sprite.rect
+        self.pos[n] = rect[0], rect[1]
+        self.size[n] = rect[2], rect[3]
+        self.vels[n] = sprite.vel
+        self.order.append(sprite)
+        self.rows[sprite] = n
+        if type(sprite).update is not Projectile.update:
+            self.hooked[sprite] = None
+        if sprite._pgroup is None:
+            sprite._pgroup = self
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        row = self.rows.pop(sprite)
+        last = len(self.order) - 1
+        if sprite._pgroup is self:
+            sprite._vel = epg.Vector2(self.vels[row].tolist())
+            sprite._pgroup = None
+        if row != last:
+            moved = self.order[row] = self.order[last]
+            self.rows[moved] = row
+            self.pos[row], self.size[row], self.vels[row] = self.pos[last], self.size[last], self.vels[last]
+        self.order.pop()
+        self.hooked.pop(sprite, None)
+
+    def get_vel(self, sprite):
+        return self.vels[self.rows[sprite]].tolist()
+
+    def set_vel(self, sprite, value):
+        self.vels[self.rows[sprite]] = value[0], value[1]
+
+    def update(self, *args, **kw):
+        # Per-object hooks first, they may steer, resize or move their rects
+        for sprite in list(self.hooked):
+            sprite.update(*args, **kw)
+            if sprite in self.rows:
+                rect, row = sprite.rect, self.rows[sprite]
+                self.pos[row] = rect[0], rect[1]
+                self.size[row] = rect[2], rect[3]
+
+        n = len(self.order)
+        if not n:
+            return
+        pos, vel = self.pos[:n], self.vels[:n]
+        pos += vel
+
+        if self.bounds:
+            b = self.bounds
+            x, y = pos.T
+            w, h = self.size[:n].T
+            dead = ((y + h < b.top) & (vel[:, 1] < 0)) | (x + w < b.left) | (x > b.right) | (y > b.bottom)
+            if dead.any():
+                for i in np.flatnonzero(dead)[::-1].tolist():
+                    self.order[i].kill()
+
+        for sprite, topleft in zip(self.order, self.pos[:len(self.order)].tolist()):
+            sprite.rect.topleft = topleft
@@ -1,6 +1,16 @@
 import epg
 
+INPUT_EVENTS = (epg.MOUSEMOTION, epg.MOUSEBUTTONDOWN, epg.MOUSEBUTTONUP, epg.MOUSEWHEEL,
+                epg.KEYDOWN, epg.KEYUP, epg.TEXTEDITING, epg.TEXTINPUT,
+                epg.FINGERDOWN, epg.FINGERUP, epg.FINGERMOTION,
+                epg.JOYAXISMOTION, epg.JOYBALLMOTION, epg.JOYHATMOTION, epg.JOYBUTTONDOWN, epg.JOYBUTTONUP)
+
 class Scene(epg.Rect):
+    fixed_step = None
+    max_steps = 5
+    dirty_rects = False
+    dirty_threshold = 0.5
+
     def __init__(self, screen=None, init=True):
         self.screen = screen if screen else epg.app.screen
         super().__init__(self.screen.get_rect())
@@ -9,6 +19,14 @@ class Scene(epg.Rect):
         self.music_manager = None
         self.funcs = {}
         self.groups = {}
+        self.handlers = {}
+        self.routes = {}
+        self.accumulator = 0
+        self.last_step = None
+        self.dirty = epg.sprite.DirtyRects(self.size, self.dirty_threshold) if self.dirty_rects else None
+        self.render_queue = epg.sprite.RenderQueue(self.screen.get_rect())
+        self.camera = epg.Camera(self.size)
+        self.timeline = epg.action.Timeline()
 
         if init:
             self.init()
@@ -17,35 +35,151 @@ class Scene(epg.Rect):
         return self is value
 
     def run(self):
-        self.scene_running = True
+        self.start()
         while self.scene_running:
             self.single_run()
             
     def single_run(self):
+        prof = epg.profiler.active
+        if prof: prof.start()
+        epg.input.begin_frame()
+
         for sendarg, func in self.funcs.values():
             if sendarg:
                 func(self)
             else:
                 func()
+        if prof: prof.mark("funcs")
         
-        self.update()
+        epg.action.frame_time = epg.get_time()
+        if self.timeline:
+            self.timeline.update()
+        if self.fixed_step:
+            self.fixed_update()
+        else:
+            epg.render_alpha = 1
+            self.update()
+        epg.action.frame_time = None
+        if prof: prof.mark("update")
         if not self.scene_running:
+            if prof: prof.end()
             return
 
+        if self.camera.changed:
+            self.camera.changed = False
+            self.mark_dirty()
+        epg.sprite.tracker, epg.sprite.camera = self.dirty, self.camera
         self._draw()
+        epg.sprite.tracker = epg.sprite.camera = None
+        if prof: prof.mark("draw")
         
         now = epg.time.get_ticks()
-        events = epg.event.get()
+        events = epg.input.get_events()
         epg.time_offset += epg.time.get_ticks() - now
 
         for event in events:
             if event.type == epg.QUIT:
                 self.onexit()
             else:
-                self.events(event)
+                self.dispatch(event)
+        if prof: prof.mark("events")
 
         epg.app.update()
-        epg.update_display()
+        if prof:
+            prof.mark("app")
+            if prof.overlay:
+                prof.draw(epg.display.get_surface())
+                self.mark_dirty()
+
+        epg.update_display(self.dirty.collect() if self.dirty else None)
+        if prof:
+            prof.mark("display")
+            prof.end()
+
+    def start(self):
+        self.scene_running = True
+        self.mark_dirty()
+        self.filter_events()
+
+    def fixed_update(self):
+        '''Run update() in fixed_step ms slices and set the render alpha for interpolation'''
+        now = epg.get_time()
+        if self.last_step is None:
+            self.last_step = now - self.fixed_step
+        self.accumulator += now - self.last_step
+        self.last_step = now
+
+        steps = 0
+        while self.accumulator > self.fixed_step - 1e-6:
+            if steps == self.max_steps:
+                self.accumulator = 0
+                break
+            self.store_positions()
+            self.update()
+            self.accumulator -= self.fixed_step
+            steps += 1
+            if not self.scene_running:
+                return
+
+        epg.render_alpha = min(max(self.accumulator / self.fixed_step, 0), 1)
+
+    def store_positions(self):
+        for group in self.groups.values():
+            for sprite in group:
+                sprite.last_pos = sprite.rect.topleft
+
+    def mark_dirty(self, rect=None):
+        '''Mark a changed area in dirty rect mode, the whole screen if rect is None'''
+        if self.dirty:
+            self.dirty.add(rect)
+
+    def bind(self, type, handler):
+        '''Call handler(event) for every event of the type'''
+        self.handlers.setdefault(type, []).append(handler)
+        self.filter_events()
+
+    def unbind(self, type, handler=None):
+        if handler:
+            self.handlers[type].remove(handler)
+        if not (handler and self.handlers[type]):
+            del self.handlers[type]
+        self.filter_events()
+
+    def route(self, sprite, *types):
+        '''Send mouse events of the types to sprite.events while the pointer is over it'''
+        for type in types:
+            if type not in self.routes:
+                self.routes[type] = epg.sprite.Group()
+            self.routes[type].add(sprite)
+        self.filter_events()
+
+    def unroute(self, sprite, *types):
+        for type in types or tuple(self.routes):
+            self.routes[type].remove(sprite)
+
+    def dispatch(self, event):
+        if handlers := self.handlers.get(event.type):
+            for handler in handlers:
+                handler(event)
+        if group := self.routes.get(event.type):
+            sprites = group.sprites()
+            if pos := getattr(event, "pos", None):
+                hits = epg.Rect(pos, (1, 1)).collidelistall([s.rect for s in sprites])
+                sprites = [sprites[i] for i in hits]
+            for sprite in sprites:
+                sprite.events(event)
+        self.events(event)
+
+    def filter_events(self):
+        '''Let SDL queue only the event types this scene handles'''
+        if epg.app.scene is not self:
+            return
+        if type(self).events is not Scene.events:
+            epg.event.set_allowed(None)
+        else:
+            wanted = set(self.handlers) | set(self.routes)
+            epg.event.set_allowed(list(wanted) + [epg.QUIT])
+            epg.event.set_blocked([t for t in INPUT_EVENTS if t not in wanted])
 
     def add_func(self, func, name=None, sendarg=False):
         if not name: name = func
@@ -57,12 +191,12 @@ class Scene(epg.Rect):
     def del_func(self, name):
         del self.funcs[name]
         
-    def add_group(self, *names, pref="group_", asattr=True):
+    def add_group(self, *names, pref="group_", asattr=True, cls=None, **groupkw):
         keys = tuple(self.groups)
         for name in names:
             if name in keys:
                 epg.throw("group %s already exists"%name)
-            self.groups[name] = g = epg.sprite.Group()
+            self.groups[name] = g = (cls or epg.sprite.Group)(**groupkw)
             if asattr: setattr(self, pref + str(name), g)
         return g
 
@@ -85,6 +219,11 @@ class Scene(epg.Rect):
         for group in self.groups.values():
             for sprite in group:
                 sprite.draw(self.screen, offset)
+
+    def queue_group(self, offset=None, layer=0):
+        '''Submit the groups to the render queue, which is drawn after draw() returns'''
+        for group in self.groups.values():
+            self.render_queue.group(group, layer, offset)
                 
     def update_group(self):
         for group in self.groups.values():
@@ -102,6 +241,11 @@ class Scene(epg.Rect):
             epg.app.cache(self, cache)
         epg.app.switch(scene)
 
+    @classmethod
+    def get_assets(cls, *args, **kw):
+        '''Return the images Prewarm should decode before building the scene with the arguments'''
+        return ()
+
     def init(self):
         pass
 
@@ -113,6 +257,7 @@ class Scene(epg.Rect):
 
     def _draw(self):
         self.draw()
+        self.render_queue.flush(self.screen)
 
     def draw(self):
         self.screen.fill((0, 0, 0))
@@ -124,15 +269,35 @@ class Scene(epg.Rect):
     def events(self, event):
         pass
 
+class Prewarm:
+    '''A scene to switch to later: its assets decode on a worker thread now,
+    the scene itself is built on the main thread when it is first needed'''
+    def __init__(self, factory, *args, assets=None, **kw):
+        if assets is None:
+            assets = factory.get_assets(*args, **kw) if hasattr(factory, "get_assets") else ()
+        self.factory, self.args, self.kw = factory, args, kw
+        self.future = epg.image.preload(*assets) if assets else None
+        self.scene = None
+
+    def done(self):
+        return not self.future or self.future.done()
+
+    def result(self):
+        if self.scene is None:
+            if self.future:
+                self.future.result()
+            self.scene = self.factory(*self.args, **self.kw)
+        return self.scene
+
 class AScene(Scene, epg.action.ActionObject):
     def __init__(self, screen=None, bgcolor=(0, 0, 0), end_func=None, init=True):
         Scene.__init__(self, screen, init=False)
         epg.action.ActionObject.__init__(self, None, end_func)
         self.real_screen = self.screen
-        self.screen = self.screen.copy()
+        self.buffer = self.screen.copy()
         self.bgcolor = bgcolor
         self.orig_image, self.orig_rect = None, None
-        self.image, self.rect = self.screen, self.screen.get_rect()
+        self.image, self.rect = self.buffer, self.buffer.get_rect()
         if init:
             self.init()
 
@@ -142,16 +307,21 @@ class AScene(Scene, epg.action.ActionObject):
     def kill(self):
         self.quit()
 
+    @property
+    def composited(self):
+        '''Whether the scene is drawn offscreen because a scene-level action is active'''
+        return self.manager is not None and (bool(self.manager) or self.manager.cover)
+
     def single_run(self):
         epg.action.ActionObject.update(self)
-        self.screen = self.image
+        self.screen = self.image if self.composited else self.real_screen
         Scene.single_run(self)
 
     def _draw(self):
-        self.real_screen.fill(self.bgcolor)
-        self.draw()
-        self.real_screen.blit(self.screen, self.rect)
-
-    def update(self):
-        epg.action.ActionObject.update(self)
-        Scene.update(self)
+        if self.screen is self.real_screen:
+            Scene._draw(self)
+        else:
+            self.mark_dirty()
+            self.real_screen.fill(self.bgcolor)
+            Scene._draw(self)
+            self.real_screen.blit(self.screen, self.rect)
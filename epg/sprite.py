@@ -1,13 +1,327 @@
 import pygame as pg
 import epg
+from functools import partial
 from pygame.sprite import *
 
+def get_draw_rect(sprite, offset=None):
+    '''Return the rect to draw the sprite at, interpolated by epg.render_alpha'''
+    rect = sprite.rect
+    last_pos = getattr(sprite, "last_pos", None)
+    if last_pos and epg.render_alpha < 1:
+        a = 1 - epg.render_alpha
+        rect = rect.move((last_pos[0] - rect[0]) * a, (last_pos[1] - rect[1]) * a)
+    if offset:
+        rect = rect.move(offset)
+    if camera and camera.moved:
+        rect = rect.move(camera.offset)
+    return rect
+
+tracker = None
+camera = None
+
+class Camera:
+    '''The area of the world a scene shows. Sprites draw at world position + offset,
+    and skip the blit when they are outside the view'''
+    def __init__(self, size, pos=(0, 0), bounds=None):
+        self.view = epg.Rect((0, 0), size)
+        self.bounds = epg.Rect(bounds) if bounds else None
+        self.offset = (0, 0)
+        self.moved = False
+        self.changed = True
+        self.move_to(pos)
+
+    def move_to(self, pos):
+        '''Put the topleft of the view at pos (rounded to pixels, kept inside bounds)'''
+        old = self.view.topleft
+        self.view.topleft = round(pos[0]), round(pos[1])
+        if self.bounds:
+            self.view.clamp_ip(self.bounds)
+        if self.view.topleft != old:
+            self.changed = True
+        self.offset = (-self.view.x, -self.view.y)
+        self.moved = self.offset != (0, 0)
+
+    def move(self, dx, dy):
+        self.move_to((self.view.x + dx, self.view.y + dy))
+
+    def center_on(self, pos):
+        self.move_to((pos[0] - self.view.w / 2, pos[1] - self.view.h / 2))
+
+    def visible(self, rect):
+        return self.view.colliderect(rect)
+
+    def to_screen(self, pos):
+        return pos[0] + self.offset[0], pos[1] + self.offset[1]
+
+    def to_world(self, pos):
+        return pos[0] - self.offset[0], pos[1] - self.offset[1]
+
+class DirtyRects:
+    '''Collect the screen areas changed since the last frame'''
+    def __init__(self, size, threshold=0.5):
+        self.screen_rect = epg.Rect((0, 0), size)
+        self.threshold = threshold
+        self.rects = []
+        self.full = True
+        self.drawn = {}
+        self.current = {}
+
+    def add(self, rect=None):
+        '''Mark the rect as changed, or the whole screen if rect is None'''
+        if rect is None:
+            self.full = True
+        elif not self.full:
+            self.rects.append(epg.Rect(rect))
+
+    def track(self, sprite, rect, image=None):
+        image = image or sprite.image
+        self.current[sprite] = (rect, image, image.get_alpha())
+
+    def collect(self):
+        '''Return the changed rects, or None if the whole screen should be flipped'''
+        add, drawn = self.add, self.drawn
+        for sprite, state in self.current.items():
+            old = drawn.pop(sprite, None)
+            if old is None:
+                add(state[0])
+            elif old[0] != state[0] or old[1] is not state[1] or old[2] != state[2]:
+                add(state[0])
+                add(old[0])
+        for old in drawn.values():
+            add(old[0])
+        self.drawn, self.current = self.current, {}
+
+        rects, self.rects = self.rects, []
+        if self.full:
+            self.full = False
+            return None
+
+        clip, area = self.screen_rect.clip, 0
+        rects = [r for r in map(clip, rects) if r]
+        for r in rects:
+            area += r.w * r.h
+        if area > self.threshold * self.screen_rect.w * self.screen_rect.h:
+            return None
+        return rects
+
 class Sprite(Sprite):
+    last_pos = None
+    pool = None
+    _mask = None
+
+    @property
+    def mask(self):
+        '''The mask of the current image, unless one was assigned'''
+        return self._mask or epg.mask.get(self.image)
+
+    @mask.setter
+    def mask(self, mask):
+        self._mask = mask
+
+    def get_draw_rect(self, offset=None):
+        return get_draw_rect(self, offset)
+
     def draw(self, screen, offset=None):
-        if offset:
-            screen.blit(self.image, self.rect.topleft + epg.Vector2(offset))
+        if camera and not camera.view.colliderect(self.rect):
+            return
+        rect = screen.blit(self.image, get_draw_rect(self, offset))
+        if tracker: tracker.track(self, rect)
+
+    def kill(self):
+        super().kill()
+        if self.pool: self.pool.release(self)
+
+    def remove_internal(self, group):
+        super().remove_internal(group)
+        if self.pool and not self.alive(): self.pool.release(self)
+
+class Pool:
+    '''Recycle the instances of a Sprite subclass, which implements reset(*args, **kw) taking
+    the same arguments as __init__. A pooled sprite goes back to the pool when it leaves its last group'''
+    def __init__(self, cls, max_size=None):
+        self.cls = cls
+        self.max_size = max_size
+        self.free = []
+        self.in_use = 0
+        self.high_water = 0
+        self.created = 0
+
+    def _new(self, *args, **kw):
+        sprite = self.cls(*args, **kw)
+        sprite.pool = self
+        self.created += 1
+        return sprite
+
+    def get(self, *args, **kw):
+        if self.free:
+            sprite = self.free.pop()
+            sprite._free = False
+            sprite.last_pos = None # don't interpolate from the previous life
+            sprite.reset(*args, **kw)
         else:
-            screen.blit(self.image, self.rect)
+            sprite = self._new(*args, **kw)
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return sprite
+
+    def release(self, sprite):
+        if getattr(sprite, "_free", False):
+            return
+        self.in_use -= 1
+        if self.max_size is not None and len(self.free) >= self.max_size:
+            sprite.pool = None
+            return
+        sprite._free = True
+        self.free.append(sprite)
+
+    def preallocate(self, n, *args, **kw):
+        '''Create instances with the given __init__ arguments until n are free'''
+        while len(self.free) < n:
+            sprite = self._new(*args, **kw)
+            sprite._free = True
+            self.free.append(sprite)
+
+    def stats(self):
+        return {"free":len(self.free), "in_use":self.in_use, "high_water":self.high_water, "created":self.created}
+
+class Entity:
+    '''A slotted sprite for objects that exist in large numbers. It works with Group and Pool,
+    and subclasses list their own attributes in __slots__'''
+    __slots__ = ("image", "rect", "last_pos", "pool", "_free", "_groups")
+
+    def __init__(self, *groups):
+        self._groups = [] # usually one or two groups, a list is far smaller than a dict
+        self.image = self.rect = self.last_pos = self.pool = None
+        if groups:
+            self.add(*groups)
+
+    def add(self, *groups):
+        for group in groups:
+            group.add(self)
+
+    def remove(self, *groups):
+        for group in groups:
+            group.remove(self)
+
+    def add_internal(self, group):
+        self._groups.append(group)
+
+    def remove_internal(self, group):
+        self._groups.remove(group)
+        if self.pool and not self._groups: self.pool.release(self)
+
+    def kill(self):
+        for group in self._groups:
+            group.remove_internal(self)
+        self._groups.clear()
+        if self.pool: self.pool.release(self)
+
+    def groups(self):
+        return self._groups.copy()
+
+    def alive(self):
+        return bool(self._groups)
+
+    def update(self, *args, **kw):
+        pass
+
+    get_draw_rect = Sprite.get_draw_rect
+    draw = Sprite.draw
+
+class AEntity(Entity, epg.action.ActionObject):
+    '''Slotted counterpart of AStatic'''
+    __slots__ = ("anchor", "end_func", "manager", "orig_image", "orig_rect")
+
+    def __init__(self, surf, *actions, end_func=None, groups=(), anchor="center", use_float=False, **rectkw):
+        Entity.__init__(self, *groups)
+        self.image = surf
+        self.rect = surf.get_frect(**rectkw) if use_float else surf.get_rect(**rectkw)
+        self.anchor = anchor
+        self.orig_image, self.orig_rect = None, None
+
+        epg.action.ActionObject.__init__(self, actions, end_func)
+        AEntity.update(self)
+
+    def update(self):
+        epg.action.ActionObject.update(self)
+
+class Group(Group):
+    def draw(self, surface, bgd=None, special_flags=0):
+        sprites = self.sprites()
+        if epg.render_alpha < 1 or (camera and camera.moved):
+            rects = surface.blits((s.image, get_draw_rect(s), None, special_flags) for s in sprites)
+        else:
+            rects = surface.blits((s.image, s.rect, None, special_flags) for s in sprites)
+        self.spritedict.update(zip(sprites, rects))
+        if tracker:
+            for sprite, rect in zip(sprites, rects):
+                tracker.track(sprite, rect)
+        self.lostsprites = []
+        return self.lostsprites
+
+class RenderQueue:
+    '''Blits submitted with a layer number during a frame, flushed in layer order (then submission order)
+    through Surface.blits in batches, skipping what lies outside the viewport'''
+    def __init__(self, viewport=None):
+        self.viewport = viewport
+        self.layers = {}
+
+    def blit(self, surf, dest, layer=0, special_flags=0):
+        if len(dest) == 2:
+            dest = surf.get_rect(topleft=dest)
+        self.layers.setdefault(layer, []).append((surf, dest, None, special_flags, None))
+
+    def sprite(self, sprite, layer=0, offset=None):
+        self.group((sprite,), layer, offset)
+
+    def group(self, group, layer=0, offset=None):
+        '''Submit the sprites; those with their own draw method are called in place'''
+        items = self.layers.setdefault(layer, [])
+        plain = epg.render_alpha == 1 and not offset and not (camera and camera.moved)
+        for s in group:
+            draw = getattr(type(s), "draw", Sprite.draw)
+            if draw is not Sprite.draw:
+                if camera and not camera.view.colliderect(s.rect):
+                    continue
+                items.append(s.draw if offset is None else partial(s.draw, offset=offset))
+            else:
+                items.append((s.image, s.rect if plain else get_draw_rect(s, offset), None, 0, s))
+
+    def call(self, func, layer=0):
+        '''Call func(surface) at this point of the layer'''
+        self.layers.setdefault(layer, []).append(func)
+
+    def clear(self):
+        self.layers = {}
+
+    def flush(self, surface):
+        layers, self.layers = self.layers, {}
+        for layer in sorted(layers):
+            batch = []
+            for item in layers[layer]:
+                if callable(item):
+                    self._blits(surface, batch)
+                    batch = []
+                    item(surface)
+                else:
+                    batch.append(item)
+            self._blits(surface, batch)
+
+    def _blits(self, surface, batch):
+        if not batch:
+            return
+        if self.viewport:
+            batch = [batch[i] for i in self.viewport.collidelistall([item[1] for item in batch])]
+        if not tracker:
+            surface.blits([item[:4] for item in batch], doreturn=False)
+            return
+        rects = surface.blits([item[:4] for item in batch])
+        for (surf, dest, area, flags, sprite), rect in zip(batch, rects):
+            if sprite:
+                tracker.track(sprite, rect)
+            else:
+                tracker.track((surf, tuple(rect)), rect, surf)
 
 class Static(Sprite):
     def __init__(self, surf, groups=(), anchor="center", use_float=False, **rectkw):
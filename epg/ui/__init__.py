@@ -200,7 +200,7 @@ class Button(Widget):
 
     def update(self):
         if self.state in ("normal", "hover"):
-            pos = epg.mouse.get_pos()
+            pos = epg.input.get_mouse_pos()
             if self.box.collidepoint(pos):
                 self.state = "hover"
             else:
@@ -1,11 +1,11 @@
 try:
     import pyi_splash
-    pyi_splash.close()
 except ImportError:
-    pass
+    pyi_splash = None
 
 import epg
 import random
+import functools
 from epg.action import *
 from epg.renderer import *
 
@@ -23,40 +23,20 @@ LEVELS = [
 ("The Sun", "Aliens on this planet have no weaknesses and are hard to defeat.", 1.8)
 ]
 MAX_LEVEL = len(LEVELS)
+LAYER_BG, LAYER_BULLETS, LAYER_ENEMIES, LAYER_PLAYER, LAYER_PARTICLES, LAYER_UI, LAYER_EFFECTS = range(7)
 
-class Particle(epg.sprite.Sprite):
-    def __init__(self, x=0, y=0, size=0):
-        super().__init__()
-        self.life = 10
-        self.x = x
-        self.y = y
-        self.size = size
-        self.p_x = random.randint(-5, 5)
-        self.p_y = random.randint(-2, 2)
-
-    def particle_player(self, screen):
-        for i in range(2):
-            epg.draw.circle(screen, (178, 178, 178), (self.x, self.y), self.size)
-        self.x += random.randint(-10, 10)
-        self.size += 0.5
-        self.life -= 0.5
-        if self.life <= 0:
-            self.kill()
+def smoke_particles():
+    return epg.particles.ParticleSystem((178, 178, 178), jitter=(10, 0), grow=0.5, decay=0.5)
 
-    def particle_enemy(self, screen):
-        epg.draw.rect(screen, (255, 0, 0), (self.x, self.y, random.randint(3, 5), random.randint(3, 5)))
-        self.x += self.p_x
-        self.y += self.p_y
-        self.p_y += 0.05
-        if self.y > HEIGHT:
-            self.kill()
+def debris_particles():
+    return epg.particles.ParticleSystem((255, 0, 0), "square", gravity=0.05, floor=HEIGHT)
 
 class Player(epg.sprite.Sprite):
     def __init__(self, game):
         super().__init__()
 
         self.types = {"idle":epg.get_image("player_idle.png"),
-        "left":epg.get_image("player_move.png"),"right":epg.image.load_transformed("player_move.png", flip=(True, False))}
+        "left":epg.get_image("player_move.png"),"right":epg.get_image("player_move.png", flip=(True, False))}
         self.image = self.types["idle"]
         self.rect = self.image.get_frect(center=(WIDTH // 2, HEIGHT - 30))
 
@@ -74,7 +54,7 @@ class Player(epg.sprite.Sprite):
         self.original_gravity = 0.5
         self.gravity = 0
         self.vel = vec(0, 0)
-        self.particles = epg.sprite.Group()
+        self.particles = smoke_particles()
 
         self.gun = Gun(self)
 
@@ -102,8 +82,9 @@ class Player(epg.sprite.Sprite):
 
     def update(self):
         self.vel.x = 0
+        self.particles.update()
 
-        keys = epg.key.get_pressed()
+        keys = epg.input.get_pressed()
         if keys[epg.K_a]:
             self.vel.x = -self.speed
         elif keys[epg.K_d]:
@@ -124,7 +105,7 @@ class Player(epg.sprite.Sprite):
             self.image = self.types["idle"]
 
         if self.vel.y < 0:
-            self.particles.add(Particle(self.rect.centerx, self.rect.bottom, 10))
+            self.particles.emit(self.rect.centerx, self.rect.bottom, size=10, life=10)
         
         if self.rect.bottom >= HEIGHT - 20:
             self.vel.y = self.gravity = 0
@@ -134,24 +115,30 @@ class Player(epg.sprite.Sprite):
 
         if self.rect.right < 0:
             self.rect.left = WIDTH
+            self.last_pos = None # don't interpolate across the screen
         elif self.rect.left > WIDTH:
             self.rect.right = 0
+            self.last_pos = None
 
         self.gun.update()
 
     def draw(self, screen):
-        super().draw(screen)
-        for p in self.particles:
-            p.particle_player(screen)
-        self.gun.draw(screen)
+        rect = self.get_draw_rect()
+        screen.blit(self.image, rect)
+        self.particles.draw(screen)
+        self.gun.draw(screen, (rect[0] - self.rect[0], rect[1] - self.rect[1]))
 
-class Bullet(epg.sprite.Sprite):
+class Bullet(epg.projectiles.Projectile):
+    __slots__ = ("game", "player", "is_player")
     id = "bullet"
     speed = 8
     damage = 10
 
     def __init__(self, game, from_pos, to_pos, is_player=False):
         super().__init__()
+        self.reset(game, from_pos, to_pos, is_player)
+
+    def reset(self, game, from_pos, to_pos, is_player=False):
         self.game = game
         if not is_player: 
             self.player = game.player
@@ -161,44 +148,25 @@ class Bullet(epg.sprite.Sprite):
         vel.normalize_ip()
         angle = vel.angle_to(vec(1, 0))
 
-        self.image = epg.transform.rotate(epg.get_image(f"{self.id}.png"), angle)
+        self.image = epg.get_transformed(epg.get_image(f"{self.id}.png"), angle)
         self.rect = self.image.get_frect(center=from_pos)
-        self.vel = vel * self.speed
+        vel *= self.speed
+        self.vel = vel
         self.init()
 
     def init(self):
         pass
 
     def fire(self, enemy):
+        damage = self.game.player.gun.damage if self.is_player else self.damage
         if self.is_player and random.random() < self.game.player.critical_hit:
-            enemy.take_damage(d := self.damage * 2)
+            enemy.take_damage(d := damage * 2)
             self.game.showtip(d, self.rect.center, color=(255, 0, 0))
         else:
-            enemy.take_damage(self.damage)
-            self.game.showtip(self.damage, self.rect.center)
+            enemy.take_damage(damage)
+            self.game.showtip(damage, self.rect.center)
         self.kill()
 
-    def update(self):
-        self.rect.topleft += self.vel
-        if self.rect.bottom < 0 and self.vel.y < 0:
-            self.kill()
-        elif self.rect.right < 0 or self.rect.left > WIDTH or self.rect.top > HEIGHT:
-            self.kill()
-
-        if self.is_player:
-            if (enemy := self.game.boss) and self.game.boss != -1:
-                if enemy.collide(self.rect):
-                    self.fire(enemy)
-                    epg.play_sound("hit.ogg")
-            for enemy in self.game.enemies:
-                if enemy.collide(self.rect):
-                    self.fire(enemy)
-                    epg.play_sound("hit.ogg")
-                    break
-        else:
-            if self.game.player.rect.colliderect(self.rect):
-                self.fire(self.game.player)
-
 class Gun(epg.sprite.Sprite):
     id = "gun"
     bullet_type = Bullet
@@ -215,25 +183,24 @@ class Gun(epg.sprite.Sprite):
         self.damage = self.bullet_type.damage
 
     def update(self):
-        pos = vec(epg.mouse.get_pos())
+        pos = vec(epg.input.get_mouse_pos())
         self.offset = pos - self.player.rect.center
         self.offset.normalize_ip()
         self.angle = self.offset.angle_to(vec(1, 0))
 
         if self.offset.x > 0:
-            self.image = epg.transform.rotate(self.original_image, self.angle)
+            self.image = epg.get_transformed(self.original_image, self.angle)
             self.rect = self.image.get_rect(midleft=self.player.rect.midright)
             from_pos = self.rect.midright
         else:
-            self.image = epg.transform.rotate(epg.transform.flip(self.original_image, False, True), self.angle)
+            self.image = epg.get_transformed(self.original_image, self.angle, flip=(False, True))
             self.rect = self.image.get_rect(midright=self.player.rect.midleft)
             from_pos = self.rect.midleft
 
         now = epg.get_time()
         if now - self.last_fire >= self.rate:
             self.last_fire = now
-            b = self.bullet_type(self.player.game, from_pos, pos, is_player=True)
-            b.damage = self.damage
+            b = self.player.game.get_pool(self.bullet_type).get(self.player.game, from_pos, pos, is_player=True)
             self.bullets.add(b)
 
 class Enemy(epg.AStatic):
@@ -304,8 +271,7 @@ class Enemy(epg.AStatic):
                     self.game.add_boss()
 
     def die(self):
-        for i in range(20):
-            self.game.enemy_particles.add(Particle(self.rect.centerx, self.rect.centery))
+        self.game.enemy_particles.emit(*self.rect.center, 20, vel=((-5, 5), (-2, 2)), size=(3, 6))
 
 class Boss(Enemy):
     health = 0
@@ -322,6 +288,7 @@ class Boss(Enemy):
         epg.draw.rect(self.bar, (255, 0, 0), (2, 2, self.health / self.healthMax * self.bar.width, 10))
         if self.health <= 0:
             self.die()
+            self.kill()
             for enemy in self.game.enemies:
                 enemy.take_damage(enemy.healthMax)
             self.game.boss = None
@@ -338,11 +305,13 @@ class Enemy1(Enemy):
         self.shoot(EnemyBullet1)
 
     def draw(self, screen, color=(255, 0, 0)):
-        screen.blit(self.image, self.rect)
+        rect = self.get_draw_rect()
+        screen.blit(self.image, rect)
         offset = (vec(self.player.rect.center) - self.rect.center).normalize() * 4
-        epg.draw.circle(screen, color, self.rect.center + offset, 8)
+        epg.draw.circle(screen, color, rect.center + offset, 8)
 
 class EnemyBullet1(Bullet):
+    __slots__ = ()
     id = "enemy_bullet1"
     damage = 10
     speed = 4
@@ -370,11 +339,13 @@ class Boss1(Boss):
         self.shoot(BossBullet1)
 
     def draw(self, screen):
-        screen.blit(self.image, self.rect)
+        rect = self.get_draw_rect()
+        screen.blit(self.image, rect)
         offset = (vec(self.player.rect.center) - self.rect.center).normalize() * 12
-        epg.draw.circle(screen, (60, 60, 60), self.rect.center + offset, 29)
+        epg.draw.circle(screen, (60, 60, 60), rect.center + offset, 29)
 
 class BossBullet1(Bullet):
+    __slots__ = ("life",)
     id = "boss_bullet1"
     damage = 20
     speed = 4.2
@@ -423,8 +394,9 @@ class Boss2(Boss):
         else:
             self.eye_x = 0
 
-        screen.blit(self.image, self.rect)
-        screen.blit(self.eye_image, self.rect.center + vec(self.eye_x - 30, -30))
+        rect = self.get_draw_rect()
+        screen.blit(self.image, rect)
+        screen.blit(self.eye_image, rect.center + vec(self.eye_x - 30, -30))
 
 class Enemy2(Enemy1):
     def init(self):
@@ -440,6 +412,7 @@ class Enemy2(Enemy1):
         super().draw(screen, (180, 230, 219))
 
 class EnemyBullet2(EnemyBullet1):
+    __slots__ = ()
     id = "enemy_bullet2"
     speed = 4.2
 
@@ -472,6 +445,7 @@ class Boss3(Boss):
             if self.fire_counter % 10 == 0:
                 b = self.shoot(EnemyBullet3)
                 if not self.visible:
+                    b.image = b.image.copy()
                     b.image.set_alpha(10)
             self.fire_counter += 1
             if self.fire_counter > 100:
@@ -487,20 +461,19 @@ class Boss3(Boss):
                 self.image.set_alpha(10)
 
     def draw(self, screen):
-        self.eye_image = epg.get_image("boss3eye.png")
-        if self.rect.centerx > self.player.rect.centerx:
-            self.eye_image = epg.transform.flip(self.eye_image, True, False)
-        if self.rect.centery > self.player.rect.centery:
-            self.eye_image = epg.transform.flip(self.eye_image, False, True)
+        self.eye_image = epg.get_transformed(epg.get_image("boss3eye.png"), flip=(
+            self.rect.centerx > self.player.rect.centerx, self.rect.centery > self.player.rect.centery))
         if self.visible:
             self.eye_image.set_alpha(255)
         else:
             self.eye_image.set_alpha(10)
 
-        screen.blit(self.image, self.rect)
-        screen.blit(self.eye_image, self.rect)
+        rect = self.get_draw_rect()
+        screen.blit(self.image, rect)
+        screen.blit(self.eye_image, rect)
 
 class EnemyBullet3(EnemyBullet1):
+    __slots__ = ()
     id = "boss_bullet1"
 
 class Enemy3(Enemy1):
@@ -512,6 +485,7 @@ class Enemy3(Enemy1):
 
     def fire(self):
         b = self.shoot(EnemyBullet3)
+        b.image = b.image.copy()
         b.image.set_alpha(30)
 
     def draw(self, screen):
@@ -526,6 +500,7 @@ class Boss4(Boss):
         super().init()
         self.angle = 0
         self.rush_counter = 0
+        epg.image.bake(epg.get_image("boss4.png"), 360 // 6)
 
     def get_surface(self):
         return epg.get_image("boss4.png")
@@ -534,14 +509,12 @@ class Boss4(Boss):
         self.shoot(EnemyBullet4)
 
     def draw(self, screen):
-        self.eye_image = epg.get_image("boss4eye.png")
-        if self.rect.centerx > self.player.rect.centerx:
-            self.eye_image = epg.transform.flip(self.eye_image, True, False)
-        if self.rect.centery > self.player.rect.centery:
-            self.eye_image = epg.transform.flip(self.eye_image, False, True)
+        self.eye_image = epg.get_transformed(epg.get_image("boss4eye.png"), flip=(
+            self.rect.centerx > self.player.rect.centerx, self.rect.centery > self.player.rect.centery))
 
-        screen.blit(self.image, self.rect)
-        screen.blit(self.eye_image, self.eye_image.get_rect(center=self.rect.center))
+        rect = self.get_draw_rect()
+        screen.blit(self.image, rect)
+        screen.blit(self.eye_image, self.eye_image.get_rect(center=rect.center))
 
     def update(self):
         super().update()
@@ -549,7 +522,7 @@ class Boss4(Boss):
         self.angle += 6
         if self.angle == 360:
             self.angle = 0
-        self.image = epg.transform.rotate(epg.get_image("boss4.png"), self.angle)
+        self.image = epg.get_transformed(epg.get_image("boss4.png"), self.angle)
         self.rect = self.image.get_rect(center=self.rect.center)
 
         if self.rect.colliderect(self.player.rect):
@@ -562,6 +535,7 @@ class Boss4(Boss):
             self.speed = 1.5
 
 class EnemyBullet4(Bullet):
+    __slots__ = ("angle",)
     id = "enemy_bullet4"
 
     def init(self):
@@ -576,7 +550,7 @@ class EnemyBullet4(Bullet):
         self.angle += 12
         if self.angle == 360:
             self.angle = 0
-        self.image = epg.transform.rotate(epg.get_image("enemy_bullet4.png"), self.angle)
+        self.image = epg.get_transformed(epg.get_image("enemy_bullet4.png"), self.angle)
         self.rect = self.image.get_rect(center=self.rect.center)
 
 class Enemy4(Enemy1):
@@ -614,14 +588,12 @@ class Boss5(Boss):
         return epg.get_image("boss5.png")
 
     def draw(self, screen):
-        self.eye_image = epg.get_image("boss5eye.png")
-        if self.rect.centerx > self.player.rect.centerx:
-            self.eye_image = epg.transform.flip(self.eye_image, True, False)
-        if self.rect.centery > self.player.rect.centery:
-            self.eye_image = epg.transform.flip(self.eye_image, False, True)
+        self.eye_image = epg.get_transformed(epg.get_image("boss5eye.png"), flip=(
+            self.rect.centerx > self.player.rect.centerx, self.rect.centery > self.player.rect.centery))
 
-        screen.blit(self.image, self.rect)
-        screen.blit(self.eye_image, self.eye_image.get_rect(center=self.rect.center))
+        rect = self.get_draw_rect()
+        screen.blit(self.image, rect)
+        screen.blit(self.eye_image, self.eye_image.get_rect(center=rect.center))
 
 class Enemy5(Enemy1):
     health = 22
@@ -640,48 +612,58 @@ class Enemy5(Enemy1):
         super().draw(screen, (255, 255, 0))
 
 class EnemyBullet5(EnemyBullet1):
+    __slots__ = ()
     id = "enemy_bullet1"
     speed = 7
 
-class Star(epg.AStatic):
+@functools.lru_cache(maxsize=None)
+def star_action(fade_in, delay, fade_out):
+    return (FadeIn(fade_in) >> Delay(delay) >> FadeOut(fade_out)) * float("inf")
+
+class Star(epg.sprite.AEntity):
+    __slots__ = ()
+
     def __init__(self):
         size = random.randint(1, 4)
         surf = epg.Surface((size, size))
         surf.fill((255, 255, 255))
         super().__init__(surf, center=(random.randint(10, WIDTH - 10), random.randint(10, HEIGHT // 2)))
-        self.act(
-            (FadeIn(random.randint(1000,10000)) >> Delay(random.randint(1000,10000)) >> \
-                FadeOut(random.randint(1000,10000))) * float("inf")
-            )
+        self.act(star_action(*(random.randrange(1000, 10001, 3000) for i in range(3))))
 
 class BG(epg.AScene):
     def init(self):
-        self.effects = epg.sprite.Group()
+        self.effects = smoke_particles()
         self.fade_colors = [(0, 0, 64), (10, 10, 10), (64, 0, 64)]
         self.fade_incr = 0.0005
         self.fade_pos = 0
+        self.fill_color = None
         self.stars = epg.sprite.Group()
         for i in range(random.randint(10, 24)):
             self.stars.add(Star())
+        self.timeline.add(*self.stars)
 
     def play_smoke_effect(self):
         if not self.effects:
             n = 100
             dx, dy = WIDTH / n, HEIGHT / n
-            for x in range(n):
-                for y in range(n):
-                    self.effects.add(Particle(x=x * dx, y=y * dy))
+            self.effects.emit([x * dx for x in range(n) for y in range(n)],
+                              [y * dy for x in range(n) for y in range(n)], life=10)
 
     def draw_effects(self):
-        for eff in self.effects:
-            eff.particle_player(self.screen)
+        if self.effects:
+            self.mark_dirty()
+        self.effects.draw(self.screen)
 
     def draw(self):
-        self.screen.fill(epg.math.mix(self.fade_colors[0], self.fade_colors[1], self.fade_pos))
+        color = tuple(map(int, epg.math.mix(self.fade_colors[0], self.fade_colors[1], self.fade_pos)))
+        if color != self.fill_color:
+            self.fill_color = color
+            self.mark_dirty()
+        self.screen.fill(color)
         self.stars.draw(self.screen)
         
     def update(self):
-        self.stars.update()
+        self.effects.update()
         self.fade_pos += self.fade_incr
         if self.fade_pos > 1:
             self.fade_pos = 0
@@ -762,7 +744,7 @@ class TextButton(epg.Static):
                     self.command()
 
     def update(self):
-        pos = epg.mouse.get_pos()
+        pos = epg.input.get_mouse_pos()
         if self.rect.collidepoint(pos):
             color = self.activecolor
         else:
@@ -773,6 +755,8 @@ class TextButton(epg.Static):
             self.image = epg.text_render(self.text, color=self.color, **self.kw)
 
 class GameOver(epg.AScene):
+    dirty_rects = True
+
     def __init__(self, game):
         self.game = game
         self.game.main_menu.total_time += epg.get_time() - self.game.start_time
@@ -781,10 +765,11 @@ class GameOver(epg.AScene):
     def init(self):
         self.text = epg.AStatic(epg.text_render("Game Over", color=(255, 0, 0), size=30), center=(WIDTH//2, HEIGHT//2))
         self.text.act(ScaleBy(1000, range=(0, 1)) >> Shake(100, dist=(3,3)) * 5)
+        self.bind(epg.MOUSEBUTTONDOWN, self.leave)
+        self.bind(epg.KEYDOWN, self.leave)
 
-    def events(self, event):
-        if event.type in (epg.MOUSEBUTTONDOWN, epg.KEYDOWN):
-            self.act(FadeOut(1000) >> Switch(scene=LevelChooser(self.game.main_menu)))
+    def leave(self, event):
+        self.act(FadeOut(1000) >> Switch(scene=epg.Prewarm(LevelChooser, self.game.main_menu)))
 
     def update(self):
         self.text.update()
@@ -793,7 +778,19 @@ class GameOver(epg.AScene):
         self.screen.fill((0, 0, 0))
         self.text.draw(self.screen)
 
+class AbilityCard(epg.AStatic):
+    def __init__(self, win, ability, surf, **kw):
+        self.win = win
+        self.id = ability
+        super().__init__(surf, **kw)
+
+    def events(self, event):
+        if event.button == 1:
+            self.win.choose(self)
+
 class Win(BG):
+    dirty_rects = True
+
     def __init__(self, game):
         self.game = game
         self.game.main_menu.level += 1
@@ -807,6 +804,7 @@ class Win(BG):
             return
 
         self.act(FadeIn(1000))
+        self.outlined = None
 
         self.buttons = epg.sprite.Group()
         g = self.group_all = epg.sprite.Group()
@@ -820,29 +818,26 @@ class Win(BG):
         d = (WIDTH - len(abts) * orig_surf.width) / (len(abts) + 1)
         for i, (a, (doc, _)) in enumerate(abts):
             surf = orig_surf.copy()
-            s = epg.AStatic(surf, midleft=(d + i * (surf.width + d), HEIGHT / 2))
-            s.id = a
-            s.act(ScaleBy(400, range=((0, 1), (1, 1))))
+            s = AbilityCard(self, a, surf, midleft=(d + i * (surf.width + d), HEIGHT / 2))
+            s.act(ScaleBy(400, range=((0, 1), (1, 1)), steps=24))
             self.buttons.add(s)
+            self.route(s, epg.MOUSEBUTTONUP)
             r = epg.text_render(a.title(), size=26, color=(255, 255, 255))
             surf.blit(r, r.get_rect(center=(surf.width / 2, surf.height / 3)))
             r = epg.text_render(doc, size=20, color=(255, 255, 255), wraplength=surf.width - 10)
             surf.blit(r, r.get_rect(center=(surf.width / 2, surf.height / 3 * 2)))
 
-    def events(self, event):
-        if event.type == epg.MOUSEBUTTONUP and event.button == 1:
-            for s in self.buttons:
-                if s.rect.collidepoint(event.pos):
-                    epg.play_sound("click.ogg")
-                    self.game.abilities.add(s.id)
-                    epg.data.dump([self.game.main_menu.level, self.game.abilities.current_abilities, self.game.main_menu.total_time])
-                    for b in self.buttons:
-                        b.kill()
-                    self.group_all.add(s)
-                    def f(s):
-                        self.act(FadeOut(400) >> Switch(scene=LevelChooser(self.game.main_menu)))
-                    s.act(ScaleBy(1000, range=(1, 1.3)) + \
-                        MoveTo(1000, range=(WIDTH//2, HEIGHT//2), anchor="center") >> f)
+    def choose(self, s):
+        epg.play_sound("click.ogg")
+        self.game.abilities.add(s.id)
+        epg.data.dump([self.game.main_menu.level, self.game.abilities.current_abilities, self.game.main_menu.total_time])
+        for b in self.buttons:
+            b.kill()
+        self.group_all.add(s)
+        def f(s):
+            self.act(FadeOut(400) >> Switch(scene=epg.Prewarm(LevelChooser, self.game.main_menu)))
+        s.act(ScaleBy(1000, range=(1, 1.3), steps=30) + \
+            MoveTo(1000, range=(WIDTH//2, HEIGHT//2), anchor="center") >> f)
 
     def update(self):
         super().update()
@@ -854,10 +849,16 @@ class Win(BG):
         self.group_all.draw(self.screen)
         self.buttons.draw(self.screen)
 
-        pos = epg.mouse.get_pos()
+        pos = epg.input.get_mouse_pos()
+        outlined = None
         for s in self.buttons:
             if s.rect.collidepoint(pos):
-                epg.draw.rect(self.screen, (255, 255, 0), s.rect, width=2)
+                outlined = s.rect.copy()
+                epg.draw.rect(self.screen, (255, 255, 0), outlined, width=2)
+        if outlined != self.outlined:
+            for rect in (outlined, self.outlined):
+                if rect: self.mark_dirty(rect)
+            self.outlined = outlined
 
 class Story(BG):
     story = [
@@ -877,6 +878,7 @@ class Story(BG):
         self.group_all = epg.sprite.Group()
         self.index = -1
         self.next()
+        self.bind(epg.MOUSEBUTTONUP, self.click)
 
     def end_command(self, s=None):
         self.switch(LevelChooser(self.main_menu))
@@ -898,8 +900,8 @@ class Story(BG):
             s.act(FadeIn(2000) >> Delay(1000) >> FadeOut(2000) >> self.next)
             self.group_all.add(s)
 
-    def events(self, event):
-        if event.type == epg.MOUSEBUTTONUP and event.button == 1:
+    def click(self, event):
+        if event.button == 1:
             epg.play_sound("click.ogg")
             self.next()
 
@@ -1006,8 +1008,8 @@ class CreditsPage(BG):
                 except IndexError:
                     pass
 
-            base = FadeOut() + Rotate(range=(0, 180)) >> Delay(600) >> FadeIn(1000) + \
-            Rotate(1000, range=(0, 180), cover=False)
+            base = FadeOut() + Rotate(range=(0, 180)) >> Delay(600) >> \
+            Rotate(1000, range=(0, 180), steps=36, cover=False) + FadeIn(1000)
             a = base >> Call(func=self.next) >> MoveBy(8000, range=(0, -self.height * .75 + 30)) + a >> \
             ScaleBy(800, range=((1, 1), (0, 1))) >> Kill()
         sprite = epg.AStatic(epg.text_render(text, size, color,
@@ -1017,6 +1019,8 @@ class CreditsPage(BG):
         self.id += 1
 
 class MainMenu(BG):
+    dirty_rects = True
+
     def init(self):
         super().init()
         self.act(FadeIn(1000))
@@ -1044,20 +1048,17 @@ class MainMenu(BG):
         b.rect.center = (WIDTH / 2, self.y)
         self.y += 50
         self.group_all.add(b)
+        self.route(b, epg.MOUSEBUTTONUP)
 
     def start_game(self):
         epg.mixer.music.play(-1)
         self.play_smoke_effect()
-        self.act(Delay(300)>>FadeOut(300)>>Switch(scene=Story(self) if self.play_story else LevelChooser(self, False)))
+        self.act(Delay(300)>>FadeOut(300)>>Switch(scene=epg.Prewarm(Story, self) if self.play_story else \
+            epg.Prewarm(LevelChooser, self, False)))
 
     def controls(self):
         self.switch(ControlsPage(self))
 
-    def events(self, event):
-        for g in self.group_all:
-            if hasattr(g, "events"):
-                g.events(event)
-
     def update(self):
         super().update()
         self.group_all.update()
@@ -1070,7 +1071,7 @@ class MainMenu(BG):
 class Planet(epg.ADynamic):
     def __init__(self, level, scale, **kw):
         self.level = level
-        im = epg.transform.scale_by(epg.load_image(f"level{level}.png"), scale)
+        im = epg.transform.scale_by(epg.get_image(f"level{level}.png"), scale)
         super().__init__({"":epg.Animation(im, x=25, y=10, interval=50)}, **kw)
 
 class LevelChooser(BG):
@@ -1092,17 +1093,20 @@ class LevelChooser(BG):
         b = self.button = TextButton("Explore!", size=26, command=self.explore)
         b.rect.center = (WIDTH / 2, HEIGHT - 110)
         g.add(b)
+        self.route(b, epg.MOUSEBUTTONUP)
 
         if self.play_effect:
             p.act(FadeIn(5000) >> Clear())
             r.act(FadeIn(500) >> (FadeOut(500) >> FadeIn(500)) * 2 >> Clear())
 
+    @classmethod
+    def get_assets(cls, main_menu, play_effect=True):
+        return (f"level{main_menu.level}.png",)
+
     def explore(self):
         self.play_smoke_effect()
-        self.act(Delay(300) >> FadeOut(300) >> Switch(scene=Game(self.main_menu, self.level, self.abilities)))
-
-    def events(self, event):
-        self.button.events(event)
+        self.act(Delay(300) >> FadeOut(300) >> \
+            Switch(scene=epg.Prewarm(Game, self.main_menu, self.level, self.abilities)))
 
     def update(self):
         super().update()
@@ -1115,6 +1119,15 @@ class LevelChooser(BG):
 
 class Game(BG):
     TIP_ACTION = FadeIn(100) >> MoveBy(500, range=(0, -10)) + FadeOut(500) >> Kill()
+    fixed_step = 1000 / 60
+
+    @classmethod
+    def get_assets(cls, main_menu, level, abilities):
+        names = [f"bg{level}.png", "player_idle.png", "player_move.png", ("player_move.png", {"flip":(True, False)}),
+                 "gun.png", "bullet.png", "line_red.png", "line_yellow.png", f"enemy{level}.png", f"boss{level}.png"]
+        if level > 1:
+            names.append(f"boss{level}eye.png")
+        return names
 
     def __init__(self, main_menu, level, abilities):
         self.main_menu = main_menu
@@ -1126,12 +1139,15 @@ class Game(BG):
 
     def init(self):
         super().init()
-        self.player_bullets = epg.sprite.Group()
-        self.enemy_bullets = epg.sprite.Group()
+        self.add_group("players", "bosses", "enemies", pref="")
+        self.add_group("player_bullets", "enemy_bullets", pref="",
+                       cls=epg.projectiles.ProjectileGroup, bounds=(0, 0, WIDTH, HEIGHT))
+        self.pools = {}
         self.player = Player(self)
+        self.players.add(self.player)
+        self.get_pool(self.player.gun.bullet_type).preallocate(8, self, (0, 0), (1, 0), is_player=True)
         self.abilities.update(self.player)
-        self.enemies = epg.sprite.Group()
-        self.enemy_particles = epg.sprite.Group()
+        self.enemy_particles = debris_particles()
         self.tips = epg.sprite.Group()
         self.boss = None
         self.start_time = epg.get_time()
@@ -1140,23 +1156,43 @@ class Game(BG):
         self.last_add_enemy = epg.get_time()
         self.death = 0
 
-        self.bg = epg.load_image("bg{}.png".format(self.level))
+        self.collisions = epg.collision.CollisionWorld()
+        for name in ("players", "bosses", "enemies", "player_bullets", "enemy_bullets"):
+            self.collisions.add_layer(name, getattr(self, name))
+        collide = lambda bullet, enemy: enemy.collide(bullet.rect)
+        self.collisions.add_rule("player_bullets", "bosses", self.hit, collide)
+        self.collisions.add_rule("player_bullets", "enemies", self.hit, collide)
+        self.collisions.add_rule("enemy_bullets", "players", self.hit)
+
+        self.bg = epg.get_image("bg{}.png".format(self.level))
         self.bg_pos = self.bg.get_rect(bottomleft=(0, HEIGHT)).topleft
 
         if self.level != 3:
             self.showtext("Aliens descend in droves!")
 
+    def get_pool(self, bullet_type):
+        if not (pool := self.pools.get(bullet_type)):
+            pool = self.pools[bullet_type] = epg.sprite.Pool(bullet_type)
+        return pool
+
     def shoot(self, bullet_type, from_pos, to_pos=None):
-        b = bullet_type(self, from_pos, to_pos if to_pos else self.player.rect.center)
+        b = self.get_pool(bullet_type).get(self, from_pos, to_pos if to_pos else self.player.rect.center)
         self.enemy_bullets.add(b)
         return b
 
+    def hit(self, pairs):
+        for bullet, target in pairs:
+            if bullet.alive() and target.alive():
+                bullet.fire(target)
+                if bullet.is_player:
+                    epg.play_sound("hit.ogg")
+
     def add_enemy(self, enemy_type, pos=None):
         self.enemies.add(e := enemy_type(self, pos=pos))
         return e
 
     def showtip(self, tip, pos, **kw):
-        tip = epg.AStatic(epg.text_render(str(tip), **kw), center=pos)
+        tip = epg.sprite.AEntity(epg.text_render(str(tip), **kw), center=pos)
         tip.act(self.TIP_ACTION)
         self.tips.add(tip)
 
@@ -1164,14 +1200,14 @@ class Game(BG):
         if not func: 
             func = lambda s: None
         y = 140
-        s = epg.AStatic(epg.get_image(f"line_{color}.png"), x=0, centery=y)
+        s = epg.sprite.AEntity(epg.get_image(f"line_{color}.png"), x=0, centery=y)
         s.act( MoveBy(2500, range=((0, 0), (-1000, 0))) >> FadeOut(500)>> func >> Kill() )
         self.tips.add(s)
-        s = epg.AStatic(epg.get_image(f"line_{color}.png"), right=WIDTH, centery=HEIGHT - y)
+        s = epg.sprite.AEntity(epg.get_image(f"line_{color}.png"), right=WIDTH, centery=HEIGHT - y)
         s.act( MoveBy(2500, range=((0, 0), (1000, 0))) >> FadeOut(500) >> Kill() )
         self.tips.add(s)
         r = epg.text_render(tip, color=color, size=50)
-        s = epg.AStatic(r, center=(WIDTH / 2, HEIGHT / 2))
+        s = epg.sprite.AEntity(r, center=(WIDTH / 2, HEIGHT / 2))
         if blink:
             s.act((FadeIn(500) >> FadeOut(500)) * 3 >> Kill())
         else:
@@ -1189,6 +1225,7 @@ class Game(BG):
         self.boss = -1
         def f(s):
             self.boss = eval("Boss{}".format(self.level))(self)
+            self.bosses.add(self.boss)
         self.showtext("The Boss is coming!", func=f)
         epg.play_sound("warning.ogg")
 
@@ -1199,6 +1236,7 @@ class Game(BG):
         if self.boss and self.boss != -1: self.boss.update()
         self.player_bullets.update()
         self.enemy_bullets.update()
+        self.collisions.step()
         self.enemy_particles.update()
         self.tips.update()
 
@@ -1212,26 +1250,28 @@ class Game(BG):
 
     def draw(self):
         super().draw()
-        self.screen.blit(self.bg, self.bg_pos)
-        self.enemy_bullets.draw(self.screen)
-        self.player_bullets.draw(self.screen)
-        for enemy in self.enemies:
-            enemy.draw(self.screen)
-        if self.boss and self.boss != -1: self.boss.draw(self.screen)
-        self.player.draw(self.screen)
-        for p in self.enemy_particles:
-            p.particle_enemy(self.screen)
-
-        self.screen.blit(self.player.bar, (28, 48))
+        queue = self.render_queue
+        queue.blit(self.bg, self.bg_pos, LAYER_BG)
+        queue.group(self.enemy_bullets, LAYER_BULLETS)
+        queue.group(self.player_bullets, LAYER_BULLETS)
+        queue.group(self.enemies, LAYER_ENEMIES)
+        queue.group(self.bosses, LAYER_ENEMIES)
+        queue.group(self.players, LAYER_PLAYER)
+        queue.call(self.enemy_particles.draw, LAYER_PARTICLES)
+
+        queue.blit(self.player.bar, (28, 48), LAYER_UI)
         if self.boss and self.boss != -1:
-            self.screen.blit(self.boss.bar, (28, 28))
-        self.tips.draw(self.screen)
-        self.draw_effects()
+            queue.blit(self.boss.bar, (28, 28), LAYER_UI)
+        queue.group(self.tips, LAYER_UI)
+        queue.call(lambda screen: self.draw_effects(), LAYER_EFFECTS)
 
 if __name__ == '__main__':
     epg.assets = "assets"
     epg.font.set_default("font.ttf")
     app = epg.init((WIDTH, HEIGHT), caption=APPNAME, icon=epg.load_image("icon.ico"), flags=epg.SCALED)
+    epg.present(epg.load_image("logo.png"), center=(WIDTH / 2, 140))
+    if pyi_splash:
+        pyi_splash.close()
     epg.mixer.music.load(epg.get_asset("bgm.mp3"))
     epg.mixer.music.set_volume(0.4)
     app.run(MainMenu())